@@ -10,6 +10,7 @@ from datetime import timedelta
 import logging
 
 from .coordinator import PronoteDataUpdateCoordinator
+from .storage import PronotePeriodStore, PronoteSnapshotStore
 
 from .const import DOMAIN, PLATFORMS, DEFAULT_REFRESH_INTERVAL
 
@@ -39,7 +40,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     coordinator = PronoteDataUpdateCoordinator(hass, entry)
 
-    await coordinator.async_refresh()
+    # Warm-start from the last good data when available, so that startup does
+    # not depend on how fast Pronote responds; fresh data follows in the
+    # background.
+    warm_started = await coordinator.async_restore_snapshot()
+    if not warm_started:
+        await coordinator.async_refresh()
 
     hass.data[DOMAIN][entry.entry_id] = {
         "coordinator": coordinator,
@@ -49,6 +55,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if warm_started:
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} {entry.title} refresh"
+        )
+
     if not coordinator.last_update_success:
         unsub = None
 
@@ -76,11 +87,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await entry_data["coordinator"].async_shutdown()
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored data of a config entry."""
+    await PronotePeriodStore(hass, entry.entry_id).async_remove()
+    await PronoteSnapshotStore(hass, entry.entry_id).async_remove()
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
     """Handle options update."""
     hass.data[DOMAIN][entry.entry_id]["coordinator"].update_interval = timedelta(
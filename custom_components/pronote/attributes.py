@@ -0,0 +1,158 @@
+"""Sensor attribute payloads for the Pronote integration."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from datetime import datetime, time
+import logging
+from types import MappingProxyType
+
+from .const import EVALUATIONS_TO_DISPLAY, GRADES_TO_DISPLAY
+from .pronote_formatter import (
+    format_absence,
+    format_average,
+    format_delay,
+    format_evaluation,
+    format_grade,
+    format_information_and_survey,
+    format_lesson,
+    format_menu,
+    format_period,
+    format_punishment,
+)
+from .refresh_tiers import dataset_of
+from .timetable import analyze_lessons
+
+_LOGGER = logging.getLogger(__name__)
+
+SINGLE_DAY_TIMETABLE_KEYS = ("lessons_today", "lessons_tomorrow", "lessons_next_day")
+TIMETABLE_KEYS = (*SINGLE_DAY_TIMETABLE_KEYS, "lessons_period")
+PERIODS_KEYS = ("periods", "previous_periods", "active_periods")
+
+
+def parse_lunch_break_time(value: str) -> time:
+    """Parse the lunch_break_time option (HH:MM)."""
+    return datetime.strptime(value, "%H:%M").time()
+
+
+def build_attribute_payloads(
+    data: dict, lunch_break_time: time
+) -> dict[str, Mapping]:
+    """Build the attribute payloads of the sensors, keyed by data key.
+
+    Payloads are built once per refresh and are read-only: sensors return
+    them as is, on top of their common attributes. A payload that cannot be
+    built is logged and left out, without affecting the others.
+    """
+    payloads = {}
+    for key, value in data.items():
+        try:
+            payload = _payload(key, value, data, lunch_break_time)
+        except Exception:
+            _LOGGER.exception("Error building the attributes of %s", key)
+            continue
+        if payload is not None:
+            payloads[key] = MappingProxyType(payload)
+    return payloads
+
+
+def _payload(key: str, value, data: dict, lunch_break_time: time) -> dict | None:
+    """Return the payload of a data key, None if it has none."""
+    if key in TIMETABLE_KEYS:
+        return _timetable_payload(
+            value, lunch_break_time, key in SINGLE_DAY_TIMETABLE_KEYS
+        )
+    if key in PERIODS_KEYS:
+        return _periods_payload(value, data["current_period"])
+    if key == "current_period":
+        return {} if value is None else format_period(value, True)
+    builder = PAYLOAD_BUILDERS.get(dataset_of(key))
+    return None if builder is None else builder(value)
+
+
+def _timetable_payload(lessons, lunch_break_time: time, single_day: bool) -> dict:
+    analysis = analyze_lessons(lessons, lunch_break_time if single_day else None)
+    payload = {
+        "lessons": tuple(
+            format_lesson(lesson, lunch_break_time) for lesson in analysis.lessons
+        ),
+        "canceled_lessons_counter": (
+            None if lessons is None else analysis.canceled_count
+        ),
+        "day_start_at": analysis.start_at,
+        "day_end_at": analysis.end_at if single_day else None,
+    }
+    if single_day is True:
+        payload["lunch_break_start_at"] = analysis.lunch_break_start_at
+        payload["lunch_break_end_at"] = analysis.lunch_break_end_at
+    return payload
+
+
+def _periods_payload(periods, current_period) -> dict:
+    current_period_name = None if current_period is None else current_period.name
+    return {
+        "periods": tuple(
+            format_period(period, period.name == current_period_name)
+            for period in periods or []
+        )
+    }
+
+
+def _formatted(items, format_func, limit: int | None = None) -> tuple:
+    """Format the first ``limit`` items of a dataset (all if None)."""
+    if items is None:
+        return ()
+    return tuple(format_func(item) for item in items[:limit])
+
+
+def _homework_payload(homework) -> dict:
+    # homework is formatted when fetched
+    return {
+        "homework": tuple(homework or ()),
+        "todo_counter": (
+            None
+            if homework is None
+            else sum(1 for item in homework if item["done"] is False)
+        ),
+    }
+
+
+def _information_and_surveys_payload(information_and_surveys) -> dict:
+    return {
+        "unread_count": (
+            None
+            if information_and_surveys is None
+            else sum(1 for item in information_and_surveys if item.read is False)
+        ),
+        "information_and_surveys": _formatted(
+            information_and_surveys, format_information_and_survey
+        ),
+    }
+
+
+PAYLOAD_BUILDERS = {
+    "grades": lambda grades: {
+        "grades": _formatted(grades, format_grade, GRADES_TO_DISPLAY - 1)
+    },
+    "evaluations": lambda evaluations: {
+        "evaluations": _formatted(
+            evaluations, format_evaluation, EVALUATIONS_TO_DISPLAY - 1
+        )
+    },
+    "averages": lambda averages: {
+        "averages": tuple(
+            sorted(
+                _formatted(averages, format_average),
+                key=lambda average: average["subject"],
+            )
+        )
+    },
+    "absences": lambda absences: {"absences": _formatted(absences, format_absence)},
+    "delays": lambda delays: {"delays": _formatted(delays, format_delay)},
+    "punishments": lambda punishments: {
+        "punishments": _formatted(punishments, format_punishment)
+    },
+    "menus": lambda menus: {"menus": _formatted(menus, format_menu)},
+    "homework": _homework_payload,
+    "information_and_surveys": _information_and_surveys_payload,
+}
@@ -1,15 +1,17 @@
-from datetime import datetime
-from homeassistant.core import HomeAssistant, callback
+from datetime import datetime, timedelta
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.components.calendar import CalendarEntity, CalendarEvent
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.util import dt as dt_util
 from homeassistant.util.dt import get_time_zone
-from zoneinfo import ZoneInfo
 
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from .coordinator import PronoteDataUpdateCoordinator
 from .pronote_formatter import format_displayed_lesson
+from .timetable import LessonIndex, analyze_lessons
 
 from .const import DOMAIN
 
@@ -33,7 +35,7 @@ async def async_setup_entry(
 @callback
 def async_get_calendar_event_from_lessons(lesson, timezone) -> CalendarEvent:
     """Get a HASS CalendarEvent from a Pronote Lesson."""
-    tz = ZoneInfo(timezone)
+    tz = get_time_zone(timezone)
 
     lesson_name = format_displayed_lesson(lesson)
     if lesson.canceled:
@@ -74,32 +76,71 @@ class PronoteCalendar(CoordinatorEntity, CalendarEntity):
             model=self.coordinator.data["child_info"].name,
         )
         self._event: CalendarEvent | None = None
+        self._events = LessonIndex([])
+        self._indexed_lessons = None
+        self._unsub_boundary: CALLBACK_TYPE | None = None
 
     @property
     def event(self) -> CalendarEvent | None:
-        """Return the next upcoming event."""
+        """Return the current or next upcoming event."""
         return self._event
 
+    async def async_added_to_hass(self) -> None:
+        """Track the current event once added to hass."""
+        await super().async_added_to_hass()
+        self._update_event_index()
+        self._update_current_event()
+        self.async_on_remove(self._cancel_boundary_tracking)
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        try:
-            lessons = self.coordinator.data["lessons_period"]
-            if lessons is None:
-                return None
-
-            now = datetime.now()
-            current_event = next(
-                event for event in lessons if event.start >= now and now < event.end
-            )
-        except StopIteration:
-            self._event = None
-        else:
-            self._event = async_get_calendar_event_from_lessons(
-                current_event, self.hass.config.time_zone
+        self._update_event_index()
+        self._update_current_event()
+        super()._handle_coordinator_update()
+
+    @callback
+    def _update_current_event(self) -> None:
+        """Select the current (or next) event and wait for the next change.
+
+        The selected event, and the calendar state, can only change when an
+        event starts or ends: a timer fires at the next of these boundaries.
+        """
+        now = dt_util.now()
+        self._event = self._events.current_or_next(now)
+
+        self._cancel_boundary_tracking()
+        boundary = self._events.next_boundary(now)
+        if boundary is not None:
+            self._unsub_boundary = async_track_point_in_time(
+                self.hass, self._async_boundary_reached, boundary
             )
 
-        super()._handle_coordinator_update()
+    @callback
+    def _async_boundary_reached(self, now: datetime) -> None:
+        """Handle an event starting or ending."""
+        self._unsub_boundary = None
+        self._update_current_event()
+        self.async_write_ha_state()
+
+    @callback
+    def _cancel_boundary_tracking(self) -> None:
+        """Cancel the timer of the next boundary."""
+        if self._unsub_boundary is not None:
+            self._unsub_boundary()
+            self._unsub_boundary = None
+
+    @callback
+    def _update_event_index(self) -> None:
+        """Build the events of the lesson window, once per refresh."""
+        lessons = self.coordinator.data.get("lessons")
+        if lessons is self._indexed_lessons:
+            return
+        self._indexed_lessons = lessons
+        self._events = LessonIndex(
+            async_get_calendar_event_from_lessons(lesson, self.hass.config.time_zone)
+            for lesson in analyze_lessons(lessons).active_lessons
+        )
 
     async def async_get_events(
         self,
@@ -108,10 +149,34 @@ class PronoteCalendar(CoordinatorEntity, CalendarEntity):
         end_date: datetime,
     ) -> list[CalendarEvent]:
         """Return calendar events within a datetime range."""
-        return [
-            async_get_calendar_event_from_lessons(event, hass.config.time_zone)
-            for event in filter(
-                lambda lesson: lesson.canceled == False,
-                self.coordinator.data["lessons_period"],
+        self._update_event_index()
+        events = self._events.between(start_date, end_date)
+
+        # Days outside of the lesson window are fetched on demand
+        tz = get_time_zone(hass.config.time_zone)
+        first_day = start_date.astimezone(tz).date()
+        last_day = (end_date.astimezone(tz) - timedelta(microseconds=1)).date()
+        window = self.coordinator.data.get("lessons_window")
+        if window is None or self.coordinator.data.get("lessons") is None:
+            ranges = [(first_day, last_day)]
+        else:
+            window_first, window_end = window
+            ranges = [
+                (first_day, min(last_day, window_first - timedelta(days=1))),
+                (max(first_day, window_end), last_day),
+            ]
+
+        for range_first, range_last in ranges:
+            if range_first > range_last:
+                continue
+            lessons = await self.coordinator.async_get_lessons(range_first, range_last)
+            events.extend(
+                LessonIndex(
+                    async_get_calendar_event_from_lessons(
+                        lesson, hass.config.time_zone
+                    )
+                    for lesson in analyze_lessons(lessons).active_lessons
+                ).between(start_date, end_date)
             )
-        ]
+
+        return sorted(events, key=lambda event: event.start)
@@ -0,0 +1,177 @@
+"""Circuit breaker of the Pronote servers."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, timedelta
+import logging
+import random
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DOMAIN
+from .server_status import (
+    STATE_MAINTENANCE,
+    STATE_OPERATIONAL,
+    STATE_UNREACHABLE,
+    ProbeResult,
+    async_get_server_probe,
+    get_pronote_base_url,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_BREAKERS = f"{DOMAIN}_breakers"
+
+# Backoff after the first failed login, doubled at each consecutive failure.
+BACKOFF_BASE = timedelta(minutes=1)
+BACKOFF_MAX = timedelta(hours=1)
+
+SERVER_DOWN_STATES = (STATE_MAINTENANCE, STATE_UNREACHABLE)
+
+
+class PronoteCircuitBreaker:
+    """Holds the refreshes of the entries of a Pronote server while it is down.
+
+    It is fed by the failed and successful logins of the coordinators, and by
+    the results of the server probe:
+
+    - while the probe finds the server in maintenance or unreachable, no
+      refresh is attempted (any other probe result ends this);
+    - after failed logins, refreshes are skipped for an exponential backoff
+      with jitter, then a single attempt is let through per backoff;
+    - as soon as the probe finds a down server operational again, the
+      breaker closes and the subscribed coordinators refresh right away.
+    """
+
+    def __init__(self, hass: HomeAssistant, base_url: str) -> None:
+        """Initialize the circuit breaker."""
+        self.hass = hass
+        self.base_url = base_url
+        self.users = 0
+        self.failures = 0
+        self.retry_at: datetime | None = None
+        self.server_down = False
+        self._listeners: list[Callable[[], None]] = []
+        self._unsub_probe = async_get_server_probe(hass, base_url).async_subscribe(
+            self._handle_probe_result
+        )
+
+    def allow_request(self, now: datetime) -> bool:
+        """Return True if a refresh may log in to the server now."""
+        if self.server_down:
+            return False
+        if self.retry_at is None:
+            return True
+        if now < self.retry_at:
+            return False
+        # Let this attempt through, and hold the others until it has ended
+        self.retry_at = now + self._backoff()
+        return True
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful login."""
+        if self.failures:
+            _LOGGER.info("Pronote server %s is answering again", self.base_url)
+        self.failures = 0
+        self.retry_at = None
+
+    def record_failure(self, now: datetime) -> None:
+        """Open the breaker (again) after a failed login."""
+        self.failures += 1
+        self.retry_at = now + self._backoff()
+        _LOGGER.log(
+            logging.WARNING if self.failures == 1 else logging.DEBUG,
+            "Login to Pronote server %s failed (%s in a row), next attempt after %s",
+            self.base_url,
+            self.failures,
+            self.retry_at,
+        )
+
+    def _backoff(self) -> timedelta:
+        """Return the backoff after the current failures, with jitter."""
+        backoff = min(BACKOFF_BASE * 2 ** max(self.failures - 1, 0), BACKOFF_MAX)
+        # "equal jitter": entries backing off together do not retry together
+        return backoff * random.uniform(0.5, 1)
+
+    @callback
+    def async_add_listener(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call a listener when the server is back; return the unsubscriber."""
+        self._listeners.append(listener)
+
+        @callback
+        def _remove_listener() -> None:
+            self._listeners.remove(listener)
+
+        return _remove_listener
+
+    @callback
+    def _handle_probe_result(self, result: ProbeResult) -> None:
+        """Open or close the breaker from a probe result."""
+        if result.state in SERVER_DOWN_STATES:
+            if not self.server_down:
+                _LOGGER.info(
+                    "Pronote server %s is %s, holding refreshes",
+                    self.base_url,
+                    result.state,
+                )
+            self.server_down = True
+            return
+        if not self.server_down:
+            return
+
+        # Any other answer lets refreshes (and their backoff) decide again
+        self.server_down = False
+        if result.state != STATE_OPERATIONAL:
+            _LOGGER.info(
+                "Pronote server %s is %s, resuming refreshes",
+                self.base_url,
+                result.state,
+            )
+            return
+
+        _LOGGER.info("Pronote server %s is operational again", self.base_url)
+        self.failures = 0
+        self.retry_at = None
+        for listener in list(self._listeners):
+            listener()
+
+    @callback
+    def async_close(self) -> None:
+        """Stop following the server probe."""
+        self._unsub_probe()
+
+
+@callback
+def async_acquire_breaker(
+    hass: HomeAssistant, config_data
+) -> PronoteCircuitBreaker | None:
+    """Return the breaker of the server of an entry, shared with its other entries.
+
+    Returns None if the URL of the server is unknown.
+    """
+    base_url = get_pronote_base_url(config_data)
+    if base_url is None:
+        return None
+    breakers: dict[str, PronoteCircuitBreaker] = hass.data.setdefault(
+        DATA_BREAKERS, {}
+    )
+    breaker = breakers.get(base_url)
+    if breaker is None:
+        breaker = breakers[base_url] = PronoteCircuitBreaker(hass, base_url)
+    breaker.users += 1
+    return breaker
+
+
+@callback
+def async_release_breaker(
+    hass: HomeAssistant, breaker: PronoteCircuitBreaker
+) -> None:
+    """Release the breaker of an entry, closing it once no entry uses it."""
+    breaker.users -= 1
+    if breaker.users > 0:
+        return
+    breakers = hass.data.get(DATA_BREAKERS, {})
+    if breakers.get(breaker.base_url) is breaker:
+        del breakers[breaker.base_url]
+    breaker.async_close()
@@ -45,6 +45,7 @@ autoslot.assignments_to_self = assignments_to_self
 
 import pronotepy
 from .pronote_helper import *
+from .session import async_handoff_client
 
 from pronotepy.ent import *
 
@@ -53,6 +54,15 @@ from .const import (
     DEFAULT_REFRESH_INTERVAL,
     DEFAULT_ALARM_OFFSET,
     DEFAULT_LUNCH_BREAK_TIME,
+    DEFAULT_FETCH_MODE,
+    FETCH_MODE_PARALLEL,
+    FETCH_MODE_BATCH,
+    DEFAULT_MAX_PARALLEL_FETCHES,
+    DEFAULT_EXECUTOR_WORKERS,
+    DEFAULT_REQUEST_BUDGET,
+    DEFAULT_DATASET_TTLS,
+    DEFAULT_ADAPTIVE_MAX_TTL,
+    DEFAULT_CLOSED_PERIOD_REVALIDATION,
 )
 
 
@@ -236,6 +246,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             self._user_inputs.update(user_input)
+            async_handoff_client(self.hass, self._user_inputs, self.pronote_client)
 
             return self.async_create_entry(
                 title=title,
@@ -278,13 +289,15 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     def __init__(self, config_entry_id: str) -> None:
         """Initialize options flow."""
         self.config_entry_id = config_entry_id
+        self._options: dict[str, Any] = {}
 
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Manage the options."""
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            self._options.update(user_input)
+            return await self.async_step_refresh_tiers()
 
         config_entry = self.hass.config_entries.async_get_entry(self.config_entry_id)
 
@@ -313,6 +326,73 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                             "alarm_offset", DEFAULT_ALARM_OFFSET
                         ),
                     ): int,
+                    vol.Optional(
+                        "max_parallel_fetches",
+                        default=config_entry.options.get(
+                            "max_parallel_fetches", DEFAULT_MAX_PARALLEL_FETCHES
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Optional(
+                        "fetch_mode",
+                        default=config_entry.options.get(
+                            "fetch_mode", DEFAULT_FETCH_MODE
+                        ),
+                    ): vol.In([FETCH_MODE_PARALLEL, FETCH_MODE_BATCH]),
+                    vol.Optional(
+                        "executor_workers",
+                        default=config_entry.options.get(
+                            "executor_workers", DEFAULT_EXECUTOR_WORKERS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Optional(
+                        "adaptive_polling",
+                        default=config_entry.options.get("adaptive_polling", True),
+                    ): bool,
+                    vol.Optional(
+                        "request_budget",
+                        default=config_entry.options.get(
+                            "request_budget", DEFAULT_REQUEST_BUDGET
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                }
+            ),
+        )
+
+    async def async_step_refresh_tiers(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the time to live of each dataset."""
+        if user_input is not None:
+            self._options.update(user_input)
+            return self.async_create_entry(title="", data=self._options)
+
+        config_entry = self.hass.config_entries.async_get_entry(self.config_entry_id)
+
+        return self.async_show_form(
+            step_id="refresh_tiers",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        f"ttl_{dataset}",
+                        default=config_entry.options.get(f"ttl_{dataset}", ttl),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0))
+                    for dataset, ttl in DEFAULT_DATASET_TTLS.items()
+                }
+            ).extend(
+                {
+                    vol.Optional(
+                        "closed_period_revalidation",
+                        default=config_entry.options.get(
+                            "closed_period_revalidation",
+                            DEFAULT_CLOSED_PERIOD_REVALIDATION,
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        "adaptive_max_ttl",
+                        default=config_entry.options.get(
+                            "adaptive_max_ttl", DEFAULT_ADAPTIVE_MAX_TTL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
                 }
             ),
         )
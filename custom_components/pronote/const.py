@@ -7,6 +7,11 @@ EVENT_TYPE = "pronote_event"
 
 LESSON_MAX_DAYS = 15
 LESSON_NEXT_DAY_SEARCH_LIMIT = 30
+# lessons fetched on demand (calendar) outside of the refreshed window
+LESSON_CACHE_MAX_DAYS = 120
+LESSON_CACHE_MAX_AGE = 360
+# longest range of days fetched by one on-demand query
+LESSON_ON_DEMAND_MAX_DAYS = 28
 HOMEWORK_MAX_DAYS = 15
 
 GRADES_TO_DISPLAY = 11
@@ -20,5 +25,42 @@ HOMEWORK_DESC_MAX_LENGTH = 125
 DEFAULT_REFRESH_INTERVAL = 15
 DEFAULT_ALARM_OFFSET = 60
 DEFAULT_LUNCH_BREAK_TIME = "13:00"
+DEFAULT_MAX_PARALLEL_FETCHES = 4
+# threads of the pool shared by all the entries (the jobs of one server can
+# only use half of them), above the parallel fetches of a single entry
+DEFAULT_EXECUTOR_WORKERS = 8
+DEFAULT_CLOSED_PERIOD_REVALIDATION = 7
+# requests per minute to a Pronote server, shared by all its entries, and the
+# number of requests that can be sent at once after a quiet spell
+DEFAULT_REQUEST_BUDGET = 60
+REQUEST_BURST = 20
+
+# fetch modes: one executor job per dataset, run concurrently, or the whole
+# fetch in a single executor job. The requests of a session go out one at a
+# time anyway (see serialize_requests), so the single job is the default: it
+# uses one thread instead of several waiting for each other.
+FETCH_MODE_PARALLEL = "parallel"
+FETCH_MODE_BATCH = "batch"
+DEFAULT_FETCH_MODE = FETCH_MODE_BATCH
+
+# default time to live of each dataset (in minutes, 0 to fetch at every refresh)
+DEFAULT_DATASET_TTLS = {
+    "lessons": 0,
+    "grades": 0,
+    "averages": 0,
+    "evaluations": 0,
+    "overall_average": 0,
+    "homework": 0,
+    "absences": 0,
+    "delays": 0,
+    "punishments": 0,
+    "information_and_surveys": 0,
+    "menus": 360,
+    "ical_url": 1440,
+}
+
+# longest time to live (in minutes) of a dataset that does not change, 0 to
+# always use the configured time to live (opt-in: it delays new_* events)
+DEFAULT_ADAPTIVE_MAX_TTL = 0
 
 PLATFORMS = [Platform.SENSOR, Platform.CALENDAR]
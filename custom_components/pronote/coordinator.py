@@ -2,106 +2,233 @@
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Mapping
 from datetime import date, datetime, timedelta
-from types import SimpleNamespace
-from typing import Any
+import time
+from typing import Any, NamedTuple
 
 import logging
-from pronotepy.dataClasses import Period as PronotePeriod
 from .pronote_helper import *
 from .pronote_formatter import *
 import re
-from zoneinfo import ZoneInfo
 from slugify import slugify
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import TimestampDataUpdateCoordinator
-
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_point_in_time
+from homeassistant.helpers.update_coordinator import (
+    TimestampDataUpdateCoordinator,
+    UpdateFailed,
+)
+from homeassistant.util import dt as dt_util
+
+from .attributes import build_attribute_payloads, parse_lunch_break_time
+from .circuit_breaker import async_acquire_breaker, async_release_breaker
+from .diff import DatasetDiff, DiffIndex
+from .executor import (
+    HandoffMeter,
+    async_acquire_executor,
+    async_release_executor,
+)
+from .records import to_record
+from .refresh_tiers import RefreshTiers
+from .scheduler import async_get_login_slots, next_refresh_delay, polling_interval
+from .server_status import get_pronote_base_url
+from .session import async_acquire_session, async_release_session, select_child
+from .storage import PronotePeriodStore, PronoteSnapshotStore
+from .timetable import (
+    LessonCache,
+    LessonRangeFetcher,
+    day_start_times,
+    school_hours,
+    split_lessons,
+)
 
 from .const import (
-    LESSON_MAX_DAYS,
-    LESSON_NEXT_DAY_SEARCH_LIMIT,
     HOMEWORK_MAX_DAYS,
+    LESSON_ON_DEMAND_MAX_DAYS,
     INFO_SURVEY_LIMIT_MAX_DAYS,
     EVENT_TYPE,
     DEFAULT_REFRESH_INTERVAL,
     DEFAULT_ALARM_OFFSET,
+    DEFAULT_MAX_PARALLEL_FETCHES,
+    DEFAULT_CLOSED_PERIOD_REVALIDATION,
+    DEFAULT_LUNCH_BREAK_TIME,
+    DEFAULT_FETCH_MODE,
+    FETCH_MODE_BATCH,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Requests expected from a batch job before the first one has been planned:
+# the context, the datasets of the day and those of the current period.
+BATCH_REQUESTS_ESTIMATE = 14
+
+
+# Period getters raise on errors (e.g. a module disabled by the school): the
+# fetch step then records the error and sets the dataset to None.
+
 
 def get_grades(period):
-    try:
-        grades = period.grades
-        return sorted(grades, key=lambda grade: grade.date, reverse=True)
-    except Exception as ex:
-        _LOGGER.info("Error getting grades from period (%s): %s", period.name, ex)
-        return None
+    grades = period.grades
+    return sorted(grades, key=lambda grade: grade.date, reverse=True)
 
 
 def get_absences(period):
-    try:
-        absences = period.absences
-        return sorted(absences, key=lambda absence: absence.from_date, reverse=True)
-    except Exception as ex:
-        _LOGGER.info("Error getting absences from period (%s): %s", period.name, ex)
-        return None
+    absences = period.absences
+    return sorted(absences, key=lambda absence: absence.from_date, reverse=True)
 
 
 def get_delays(period):
-    try:
-        delays = period.delays
-        return sorted(delays, key=lambda delay: delay.date, reverse=True)
-    except Exception as ex:
-        _LOGGER.info("Error getting delays from period (%s): %s", period.name, ex)
-        return None
+    delays = period.delays
+    return sorted(delays, key=lambda delay: delay.date, reverse=True)
 
 
 def get_averages(period):
-    try:
-        averages = period.averages
-        return averages
-    except Exception as ex:
-        _LOGGER.info("Error getting averages from period (%s): %s", period.name, ex)
-        return None
+    return period.averages
 
 
 def get_punishments(period):
-    try:
-        punishments = period.punishments
-        return sorted(
-            punishments,
-            key=lambda punishment: punishment.given.strftime("%Y-%m-%d"),
-            reverse=True,
-        )
-    except Exception as ex:
-        _LOGGER.info("Error getting punishments from period (%s): %s", period.name, ex)
-        return None
+    punishments = period.punishments
+    return sorted(
+        punishments,
+        key=lambda punishment: punishment.given.strftime("%Y-%m-%d"),
+        reverse=True,
+    )
 
 
 def get_evaluations(period):
-    try:
-        evaluations = period.evaluations
-        evaluations = sorted(evaluations, key=lambda evaluation: (evaluation.name))
-        return sorted(
-            evaluations, key=lambda evaluation: (evaluation.date), reverse=True
-        )
-    except Exception as ex:
-        _LOGGER.info("Error getting evaluations from period (%s): %s", period.name, ex)
-        return None
+    evaluations = period.evaluations
+    evaluations = sorted(evaluations, key=lambda evaluation: (evaluation.name))
+    return sorted(evaluations, key=lambda evaluation: (evaluation.date), reverse=True)
 
 
 def get_overall_average(period):
+    return period.overall_average
+
+
+def get_homework(client, date_from, date_to=None):
+    # homework is exposed formatted by the sensors
+    homework = client.homework(date_from, date_to)
+    return [
+        format_homework(hw) for hw in sorted(homework, key=lambda hw: hw.date)
+    ]
+
+
+def get_information_and_surveys(client, date_from):
+    information_and_surveys = client.information_and_surveys(date_from)
+    return sorted(
+        information_and_surveys,
+        key=lambda information_and_survey: information_and_survey.creation_date,
+        reverse=True,
+    )
+
+
+class FetchPlan(NamedTuple):
+    """The datasets to fetch in a refresh, and those reused as is."""
+
+    # data key -> (func, *args), run in the executor
+    steps: dict
+    reused: dict
+    # closed period key -> data keys fetched, to store once fetched
+    closed_periods: dict
+
+
+class FetchContext(NamedTuple):
+    """What a refresh needs to know about the session before fetching data."""
+
+    credentials: dict
+    password: str | None
+    # record, None if the child could not be found
+    child_info: Any
+    # pronotepy periods, needed to fetch their datasets
+    periods: list | None
+    current_period: Any
+    previous_periods: list
+    # records of the periods, for the data
+    period_records: dict
+
+
+def get_fetch_context(client, config_data) -> FetchContext:
+    """Read the session information of a refresh (blocking).
+
+    Several of these client attributes are lazy and network-backed, so they
+    are all read here, in the executor.
+    """
+    credentials = client.export_credentials()
+
+    child_info = client.info
+    if config_data["account_type"] == "parent":
+        select_child(client, config_data)
+        child_info = client._selected_child
+
+    # Periods (read from the login payload, needed to plan the fetch)
+    periods = None
+    current_period = None
     try:
-        return period.overall_average
+        periods = client.periods
     except Exception as ex:
-        _LOGGER.info(
-            "Error getting overall average from period (%s): %s", period.name, ex
-        )
-        return None
+        _LOGGER.info("Error getting periods from pronote: %s", ex)
+    try:
+        current_period = client.current_period
+    except Exception as ex:
+        _LOGGER.info("Error getting current period from pronote: %s", ex)
+
+    # determine previous periods (handle only trimestres and semestres)
+    supported_period_types = ["trimestre", "semestre"]
+    period_type = None
+    previous_periods = []
+    if current_period is not None:
+        period_type = current_period.name.split(" ")[0].lower()
+
+    if period_type in supported_period_types and periods is not None:
+        for period in periods:
+            if (
+                    period.name.lower().startswith(period_type)
+                    and period.start < current_period.start
+            ):
+                previous_periods.append(period)
+
+    return FetchContext(
+        credentials=credentials,
+        password=client.password,
+        child_info=to_record(child_info),
+        periods=periods,
+        current_period=current_period,
+        previous_periods=previous_periods,
+        period_records={
+            "periods": to_record(periods),
+            "current_period": to_record(current_period),
+            "previous_periods": to_record(previous_periods),
+        },
+    )
+
+
+def get_child_lessons(client, config_data, date_from, date_to) -> list:
+    """Return the lesson records of the child of an entry (blocking)."""
+    select_child(client, config_data)
+    return to_record(client.lessons(date_from, date_to))
+
+
+def _fetch_records(func, *args):
+    """Run a fetch step and convert its result to records."""
+    return to_record(func(*args))
+
+
+def _period_steps(period, period_key=None) -> dict:
+    """Return the fetch steps of the datasets of a period."""
+    suffix = "" if period_key is None else f"_{period_key}"
+    return {
+        f"grades{suffix}": (get_grades, period),
+        f"averages{suffix}": (get_averages, period),
+        f"absences{suffix}": (get_absences, period),
+        f"delays{suffix}": (get_delays, period),
+        f"evaluations{suffix}": (get_evaluations, period),
+        f"punishments{suffix}": (get_punishments, period),
+        f"overall_average{suffix}": (get_overall_average, period),
+    }
 
 
 class PronoteDataUpdateCoordinator(TimestampDataUpdateCoordinator):
@@ -120,17 +247,75 @@ class PronoteDataUpdateCoordinator(TimestampDataUpdateCoordinator):
             ),
         )
         self.config_entry = entry
+        self._session = async_acquire_session(hass, entry.data)
+        self._login_slots = async_get_login_slots(hass, entry.data)
+        self._breaker = async_acquire_breaker(hass, entry.data)
+        self._unsub_breaker: CALLBACK_TYPE | None = None
+        if self._breaker is not None:
+            self._unsub_breaker = self._breaker.async_add_listener(
+                self._async_server_recovered
+            )
+        self._lesson_range = LessonRangeFetcher()
+        self._lesson_cache = LessonCache()
+        self._tiers = RefreshTiers(entry)
+        self._period_store = PronotePeriodStore(hass, entry.entry_id)
+        self._snapshot_store = PronoteSnapshotStore(hass, entry.entry_id)
+        self.fetch_errors: dict[str, Exception] = {}
+        self.fetch_stats: dict[str, Any] = {}
+        self._executor = async_acquire_executor(hass)
+        self._host = get_pronote_base_url(entry.data)
+        self._handoffs = HandoffMeter(
+            hass, self._executor, self._session.rate_limiter, self._host
+        )
+        # requests of the last batch job, reserved by the next one
+        self._batch_requests = BATCH_REQUESTS_ESTIMATE
+        self._diff_indexes: dict[str, DiffIndex] = {}
+        self.attributes: dict[str, Mapping] = {}
+        # data of the last successful refresh (or snapshot), reused as is for
+        # the datasets that are not due
+        self._last_good: dict | None = None
+        self._day_starts: list[datetime] = []
+        self._school_hours: list[tuple[datetime, datetime]] = []
+        self.polling_mode: str | None = None
+        self._unsub_alarm: CALLBACK_TYPE | None = None
+
+    async def async_shutdown(self) -> None:
+        """Cancel any scheduled refresh and close the Pronote session."""
+        await super().async_shutdown()
+        self._cancel_alarm_tracking()
+        if self._executor is None:
+            return
+        if self._breaker is not None:
+            self._unsub_breaker()
+            async_release_breaker(self.hass, self._breaker)
+        if async_release_session(self.hass, self._session):
+            await self._executor.async_run(
+                self.hass, self._session.close, host=self._host
+            )
+        async_release_executor(self.hass, self._executor)
+        self._executor = None
 
     async def _async_update_data(self) -> dict[Platform, dict[str, Any]]:
         """Get the latest data from Pronote and updates the state."""
+        breaker = self._breaker
+        if breaker is not None and not breaker.allow_request(dt_util.utcnow()):
+            raise UpdateFailed(
+                f"Pronote server {breaker.base_url} is down, refresh skipped"
+            )
+
         today = date.today()
-        previous_data = None if self.data is None else self.data.copy()
+        now = datetime.now()
+        previous_data = None if self._last_good is None else self._last_good.copy()
 
+        # The refresh is built aside: a failed refresh leaves the data of the
+        # last successful one in place.
         config_data = self.config_entry.data
-        self.data = {
+        data = {
             "account_type": config_data["account_type"],
             "sensor_prefix": None,
             "child_info": None,
+            "lessons": None,
+            "lessons_window": None,
             "lessons_today": [],
             "lessons_tomorrow": [],
             "lessons_next_day": [],
@@ -154,446 +339,574 @@ class PronoteDataUpdateCoordinator(TimestampDataUpdateCoordinator):
             "overall_average": None,
         }
 
-        client = await self.hass.async_add_executor_job(get_pronote_client, config_data)
-        if client is None:
-            _LOGGER.error("Unable to init pronote client")
-            return None
+        # The session is kept alive between refreshes, and shared by the
+        # children of a parent account: only log in again when it has expired
+        # and could not be renewed.
+        async with self._session.lock:
+            async with self._login_slots:
+                try:
+                    client = await self._executor.async_run(
+                        self.hass,
+                        self._session.get_client,
+                        config_data,
+                        rate_limiter=self._session.rate_limiter,
+                        host=self._host,
+                    )
+                except Exception as err:
+                    # e.g. token_login of QR code entries raising CryptoError
+                    _LOGGER.info("Pronote login failed: %s", err)
+                    client = None
+            if client is None:
+                if breaker is not None:
+                    breaker.record_failure(dt_util.utcnow())
+                raise UpdateFailed("Unable to init pronote client")
+            if breaker is not None:
+                breaker.record_success()
+
+            data, fetched = await self._fetch_data(
+                client, data, today, now, previous_data
+            )
+        if data is not None:
+            for key in fetched:
+                self._tiers.mark_fetched(key, now)
+            self._last_good = data
+            self._day_starts = day_start_times(data["lessons"])
+            self._school_hours = school_hours(data["lessons"])
+            self._update_next_alarm(data)
+            await self._async_build_attributes(data)
+            await self._snapshot_store.async_save(data)
+        else:
+            self._cancel_alarm_tracking()
+
+        return data
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Schedule the next refresh at the next refresh slot of the entry.
+
+        Entries refresh at their own phase of the interval instead of an
+        interval after their setup, so they do not all hit Pronote together
+        after a restart.
+
+        With adaptive polling, the interval is stretched outside of school
+        hours and during holidays; a manual refresh (``update_entity``) is
+        always run right away.
+        """
+        if self.update_interval is None or self.config_entry.pref_disable_polling:
+            return
+        self._async_unsub_refresh()
+        interval = self.update_interval
+        latest = None
+        self.polling_mode = None
+        if self.data is not None and self.config_entry.options.get(
+            "adaptive_polling", True
+        ):
+            interval, self.polling_mode, latest = polling_interval(
+                datetime.now(),
+                self._school_hours,
+                self.data.get("lessons_window"),
+                self.data.get("periods"),
+                interval,
+            )
+        delay = next_refresh_delay(
+            self.config_entry.entry_id, interval.total_seconds(), time.time()
+        )
+        if latest is not None:
+            # be there when school hours start, whatever the phase and jitter
+            delay = min(delay, max(latest.total_seconds(), 0))
+        _LOGGER.debug(
+            "Next refresh of %s in %.0f s (polling mode: %s)",
+            self.config_entry.title,
+            delay,
+            self.polling_mode,
+        )
+        self._unsub_refresh = async_call_later(
+            self.hass, delay, self._handle_refresh_interval
+        )
 
-        try:
-            return await self._fetch_data(client, today, previous_data)
-        finally:
-            try:
-                if hasattr(client, 'session') and client.session is not None:
-                    await self.hass.async_add_executor_job(client.session.close)
-            except Exception:
-                pass
-            # Clear the class-level set that accumulates every Period ever created
-            PronotePeriod.instances.clear()
-
-    async def _fetch_data(self, client, today, previous_data):
-        """Fetch all data from Pronote client."""
+    @callback
+    def _async_server_recovered(self) -> None:
+        """Refresh right away when the server is back."""
+        self.hass.async_create_task(self.async_request_refresh())
+
+    async def async_restore_snapshot(self) -> bool:
+        """Load the data of the last successful refresh, if any.
+
+        Returns True if the coordinator has data; a refresh is still needed to
+        replace it with fresh data.
+        """
+        snapshot = await self._snapshot_store.async_load()
+        if snapshot is None:
+            return False
+
+        data, saved_at = snapshot
+        # Roll the timetable views over to today
+        data.update(split_lessons(data.get("lessons"), date.today()))
+        self.data = self._last_good = data
+        self._day_starts = day_start_times(data.get("lessons"))
+        self._school_hours = school_hours(data.get("lessons"))
+        self._update_next_alarm()
+        await self._async_build_attributes(data)
+        self.async_set_updated_data(data)
+        self.last_update_success_time = saved_at
+        return True
+
+    @callback
+    def _update_next_alarm(self, data: dict | None = None) -> None:
+        """Set next_alarm from the day start times, and wait for it to pass.
+
+        Sets it in ``data`` (a refresh being built), the current data if None.
+        When the alarm passes, the alarm of the next day with lessons is
+        selected without fetching anything.
+        """
+        self._cancel_alarm_tracking()
+        if data is None:
+            data = self.data
+        if data is None:
+            # no data (e.g. child not found): no alarm
+            return
+        alarm_offset = timedelta(
+            minutes=self.config_entry.options.get("alarm_offset", DEFAULT_ALARM_OFFSET)
+        )
+        tz = dt_util.get_time_zone(self.hass.config.time_zone)
+        now = dt_util.now()
+        next_alarm = next(
+            (
+                alarm
+                for alarm in (
+                    (start - alarm_offset).replace(tzinfo=tz)
+                    for start in self._day_starts
+                )
+                if alarm > now
+            ),
+            None,
+        )
+        data["next_alarm"] = next_alarm
+        if next_alarm is not None:
+            self._unsub_alarm = async_track_point_in_time(
+                self.hass, self._async_alarm_passed, next_alarm
+            )
+
+    @callback
+    def _async_alarm_passed(self, now: datetime) -> None:
+        """Move next_alarm forward once it has passed."""
+        self._unsub_alarm = None
+        self._update_next_alarm()
+        self.async_update_listeners()
+
+    @callback
+    def _cancel_alarm_tracking(self) -> None:
+        """Cancel the timer of the next alarm."""
+        if self._unsub_alarm is not None:
+            self._unsub_alarm()
+            self._unsub_alarm = None
+
+    async def async_get_lessons(self, first_day: date, last_day: date) -> list:
+        """Return the lessons of days outside of the lesson window.
+
+        Days are fetched on demand with the live session (one query for the
+        missing days, up to LESSON_ON_DEMAND_MAX_DAYS from the first one) and
+        cached; only cached days are returned beyond that, when there is no
+        live session or when the query fails.
+        """
+        missing = self._lesson_cache.missing_days(first_day, last_day, datetime.now())
+        if not missing:
+            return self._lesson_cache.get(first_day, last_day)
+        # a long query would hold the session of the account for too long
+        missing = [
+            day
+            for day in missing
+            if day < missing[0] + timedelta(days=LESSON_ON_DEMAND_MAX_DAYS)
+        ]
+
+        async with self._session.lock:
+            client = self._session.client
+            if client is not None:
+                try:
+                    lessons = await self._executor.async_run(
+                        self.hass,
+                        get_child_lessons,
+                        client,
+                        self.config_entry.data,
+                        missing[0],
+                        missing[-1] + timedelta(days=1),
+                        rate_limiter=self._session.rate_limiter,
+                        host=self._host,
+                    )
+                except Exception as ex:
+                    _LOGGER.info(
+                        "Error getting lessons from %s to %s from pronote: %s",
+                        missing[0],
+                        missing[-1],
+                        ex,
+                    )
+                else:
+                    self._lesson_cache.set(
+                        missing[0], missing[-1], lessons, datetime.now()
+                    )
+
+        return self._lesson_cache.get(first_day, last_day)
+
+    async def _async_build_attributes(self, data: dict) -> None:
+        """Build the sensor attribute payloads of new data."""
+        lunch_break_time = parse_lunch_break_time(
+            self.config_entry.options.get(
+                "lunch_break_time", DEFAULT_LUNCH_BREAK_TIME
+            )
+        )
+        self.attributes = await self.hass.async_add_executor_job(
+            build_attribute_payloads, data, lunch_break_time
+        )
+
+    async def _fetch_data(self, client, data, today, now, previous_data):
+        """Fetch all data from Pronote client into ``data``.
+
+        Returns the data (None without child info) and the keys fetched.
+        """
         config_data = self.config_entry.data
 
+        await self._period_store.async_load()
+
+        # Everything touching the client runs in the executor
+        self._handoffs.reset()
+        fetch_mode = self.config_entry.options.get("fetch_mode", DEFAULT_FETCH_MODE)
+        if fetch_mode == FETCH_MODE_BATCH:
+            context, plan, datasets, errors = await self._handoffs.async_run(
+                self._fetch_batch,
+                client,
+                config_data,
+                today,
+                now,
+                previous_data,
+                tokens=self._batch_requests,
+            )
+            self._batch_requests = len(plan.steps) + 1
+        else:
+            context = await self._handoffs.async_run(
+                get_fetch_context, client, config_data
+            )
+            plan = self._plan_fetch(client, context, today, now, previous_data)
+            datasets, errors = await self._async_fetch_datasets(plan.steps)
+        self._report_handoffs(fetch_mode, len(plan.steps) + 1)
+
         # Save possibly refreshed credentials
-        new_creds = await self.hass.async_add_executor_job(client.export_credentials)
+        new_creds = context.credentials
         new_data = self.config_entry.data.copy()
         new_data.update({k: v for k, v in new_creds.items() 
                          if k in ['jeton', 'uuid', 'client_identifier']})
         
         # + client.password (QR PIN ou jeton) 
-        new_data["qr_code_password"] = client.password
+        new_data["qr_code_password"] = context.password
         if new_creds.get("uuid"):
             new_data["qr_code_uuid"] = new_creds["uuid"]
         
         self.hass.config_entries.async_update_entry(self.config_entry, data=new_data)
-        
-        child_info = client.info
-
-        if config_data["account_type"] == "parent":
-            client.set_child(config_data["child"])
-            child_info = client._selected_child
 
+        child_info = context.child_info
         if child_info is None:
-            return None
+            return None, []
 
-        self.data["child_info"] = child_info
-        self.data["sensor_prefix"] = re.sub("[^A-Za-z]", "_", child_info.name.lower())
+        data["child_info"] = child_info
+        data["sensor_prefix"] = re.sub("[^A-Za-z]", "_", child_info.name.lower())
 
-        # Lessons
-        try:
-            lessons_today = await self.hass.async_add_executor_job(
-                client.lessons, today
-            )
-            self.data["lessons_today"] = sorted(
-                lessons_today, key=lambda lesson: lesson.start
+        raw_current_period = context.current_period
+        raw_previous_periods = context.previous_periods
+        if raw_current_period is not None:
+            data["current_period_key"] = slugify(
+                raw_current_period.name, separator="_"
             )
-        except Exception as ex:
-            self.data["lessons_today"] = None
-            _LOGGER.info("Error getting lessons_today from pronote: %s", ex)
 
-        try:
-            lessons_tomorrow = await self.hass.async_add_executor_job(
-                client.lessons, today + timedelta(days=1)
-            )
-            self.data["lessons_tomorrow"] = sorted(
-                lessons_tomorrow, key=lambda lesson: lesson.start
-            )
-        except Exception as ex:
-            self.data["lessons_tomorrow"] = None
-            _LOGGER.info("Error getting lessons_tomorrow from pronote: %s", ex)
+        self.fetch_errors = errors
+        for key, error in errors.items():
+            _LOGGER.info("Error getting %s from pronote: %s", key, error)
+        data.update(plan.reused)
+        data.update(datasets)
 
-        lessons_period = None
-        delta = LESSON_MAX_DAYS
-        while True and delta > 0:
-            try:
-                lessons_period = await self.hass.async_add_executor_job(
-                    client.lessons, today, today + timedelta(days=delta)
-                )
-            except Exception as ex:
-                _LOGGER.debug(
-                    f"No lessons at: {delta} from today, searching best earlier alternative ({ex})"
+        previous_period_keys = [
+            slugify(period.name, separator="_") for period in raw_previous_periods
+        ]
+        for period_key, data_keys in plan.closed_periods.items():
+            # a dataset can be None (e.g. no overall average), not an error
+            if not any(key in errors for key in data_keys):
+                self._period_store.async_set(
+                    period_key,
+                    {key: data[key] for key in data_keys},
+                    now,
+                    keep=previous_period_keys,
                 )
-            if lessons_period:
-                break
-            delta = delta - 1
-        _LOGGER.debug(
-            f"Lessons found at: {delta} days, for a maximum of {LESSON_MAX_DAYS} from today"
-        )
-        self.data["lessons_period"] = (
-            sorted(lessons_period, key=lambda lesson: lesson.start)
-            if lessons_period is not None
-            else None
-        )
 
-        if (
-                self.data["lessons_tomorrow"] is not None
-                and len(self.data["lessons_tomorrow"]) > 0
-        ):
-            self.data["lessons_next_day"] = self.data["lessons_tomorrow"]
-        else:
-            try:
-                delta = 2
-                while True and delta < LESSON_NEXT_DAY_SEARCH_LIMIT:
-                    lessons_nextday = await self.hass.async_add_executor_job(
-                        client.lessons, today + timedelta(days=delta)
-                    )
-                    if lessons_nextday:
-                        break
-                    else:
-                        lessons_nextday = None
-                    delta = delta + 1
-
-                if lessons_nextday is not None:
-                    self.data["lessons_next_day"] = sorted(
-                        lessons_nextday, key=lambda lesson: lesson.start
-                    )
-                    lessons_nextday = None
-                    del lessons_nextday
-                else:
-                    self.data["lessons_next_day"] = None
-            except Exception as ex:
-                self.data["lessons_next_day"] = None
-                _LOGGER.info("Error getting lessons_next_day from pronote: %s", ex)
-
-        next_alarm = None
-        tz = ZoneInfo(self.hass.config.time_zone)
-        today_start_at = get_day_start_at(self.data["lessons_today"])
-        next_day_start_at = get_day_start_at(self.data["lessons_next_day"])
-        if today_start_at or next_day_start_at:
-            alarm_offset = self.config_entry.options.get(
-                "alarm_offset", DEFAULT_ALARM_OFFSET
+        # Days covered by the lesson window, [first, last[
+        if "lessons" in datasets:
+            data["lessons_window"] = (
+                None
+                if datasets["lessons"] is None
+                else (today, today + timedelta(days=self._lesson_range.horizon))
             )
-            if today_start_at is not None:
-                todays_alarm = today_start_at - timedelta(minutes=alarm_offset)
-                if datetime.now() <= todays_alarm:
-                    next_alarm = todays_alarm
-            if next_alarm is None and next_day_start_at is not None:
-                next_alarm = next_day_start_at - timedelta(minutes=alarm_offset)
-        if next_alarm is not None:
-            next_alarm = next_alarm.replace(tzinfo=tz)
+        elif previous_data is not None:
+            data["lessons_window"] = previous_data.get("lessons_window")
 
-        self.data["next_alarm"] = next_alarm
+        # Timetable views are all derived from the one lesson window
+        data.update(split_lessons(data["lessons"], today))
 
-        # Grades
-        self.data["grades"] = await self.hass.async_add_executor_job(
-            get_grades, client.current_period
-        )
+        # Events
         self.compare_data(
+            data,
             previous_data,
             "grades",
             ["date", "subject", "grade_out_of", "comment"],
             "new_grade",
             format_grade,
         )
-
-        # Averages
-        self.data["averages"] = await self.hass.async_add_executor_job(
-            get_averages, client.current_period
-        )
-
-        # Homework (pre-format to avoid accessing _client after strip)
-        try:
-            homework = await self.hass.async_add_executor_job(client.homework, today)
-            homework_sorted = sorted(homework, key=lambda lesson: lesson.date)
-            self.data["homework"] = [format_homework(hw) for hw in homework_sorted]
-        except Exception as ex:
-            self.data["homework"] = None
-            _LOGGER.info("Error getting homework from pronote: %s", ex)
-
-        try:
-            homework_period = await self.hass.async_add_executor_job(
-                client.homework, today, today + timedelta(days=HOMEWORK_MAX_DAYS)
-            )
-            homework_period_sorted = sorted(
-                homework_period, key=lambda homework: homework.date
-            )
-            self.data["homework_period"] = [format_homework(hw) for hw in homework_period_sorted]
-        except Exception as ex:
-            self.data["homework_period"] = None
-            _LOGGER.info("Error getting homework_period from pronote: %s", ex)
-
-        # Information and Surveys
-        try:
-            date_from = datetime.combine(today - timedelta(days=INFO_SURVEY_LIMIT_MAX_DAYS), datetime.min.time())
-            information_and_surveys = await self.hass.async_add_executor_job(
-                client.information_and_surveys,
-                date_from,
-            )
-            self.data["information_and_surveys"] = sorted(
-                information_and_surveys,
-                key=lambda information_and_survey: information_and_survey.creation_date,
-                reverse=True,
-            )
-        except Exception as ex:
-            self.data["information_and_surveys"] = None
-            _LOGGER.info("Error getting information_and_surveys from pronote: %s", ex)
-
-        # Absences
-        self.data["absences"] = await self.hass.async_add_executor_job(
-            get_absences, client.current_period
-        )
         self.compare_data(
-            previous_data, "absences", ["from", "to"], "new_absence", format_absence
-        )
-
-        # Delays
-        self.data["delays"] = await self.hass.async_add_executor_job(
-            get_delays, client.current_period
+            data,
+            previous_data,
+            "absences",
+            ["from", "to"],
+            "new_absence",
+            format_absence,
         )
         self.compare_data(
-            previous_data, "delays", ["date", "minutes"], "new_delay", format_delay
-        )
-
-        # Evaluations
-        self.data["evaluations"] = await self.hass.async_add_executor_job(
-            get_evaluations, client.current_period
+            data,
+            previous_data,
+            "delays",
+            ["date", "minutes"],
+            "new_delay",
+            format_delay,
         )
         self.compare_data(
+            data,
             previous_data,
             "evaluations",
             ["name", "date", "subject"],
             "new_evaluation",
             format_evaluation,
         )
-
-        # Punishments
-        self.data["punishments"] = await self.hass.async_add_executor_job(
-            get_punishments, client.current_period
-        )
-
-        # iCal
-        try:
-            self.data["ical_url"] = await self.hass.async_add_executor_job(
-                client.export_ical
+        for period in raw_previous_periods:
+            period_key = slugify(period.name, separator="_")
+            self.compare_data(
+                data,
+                previous_data,
+                f"grades_{period_key}",
+                ["date", "subject", "grade_out_of"],
+                "new_grade",
+                format_grade,
             )
-        except Exception as ex:
-            _LOGGER.info("Error getting ical_url from pronote: %s", ex)
-
-        # Menus
-        try:
-            self.data["menus"] = await self.hass.async_add_executor_job(
-                client.menus, today, today + timedelta(days=7)
+            self.compare_data(
+                data,
+                previous_data,
+                f"absences_{period_key}",
+                ["from", "to"],
+                "new_absence",
+                format_absence,
+            )
+            self.compare_data(
+                data,
+                previous_data,
+                f"delays_{period_key}",
+                ["date", "minutes"],
+                "new_delay",
+                format_delay,
+            )
+            self.compare_data(
+                data,
+                previous_data,
+                f"evaluations_{period_key}",
+                ["name", "date", "subject"],
+                "new_evaluation",
+                format_evaluation,
             )
-        except Exception as ex:
-            self.data["menus"] = None
-            _LOGGER.info("Error getting menus from pronote: %s", ex)
 
-        # Overall average
-        self.data["overall_average"] = await self.hass.async_add_executor_job(
-            get_overall_average, client.current_period
+        data.update(context.period_records)
+        data["active_periods"] = data["previous_periods"] + (
+            [data["current_period"]]
+            if data["current_period"] is not None
+            else []
         )
 
-        # Periods
-        raw_periods = None
-        raw_current_period = None
-        try:
-            raw_periods = client.periods
-        except Exception as ex:
-            _LOGGER.info("Error getting periods from pronote: %s", ex)
-        try:
-            raw_current_period = client.current_period
-            self.data["current_period_key"] = slugify(
-                raw_current_period.name, separator="_"
-            )
-        except Exception as ex:
-            _LOGGER.info("Error getting current period from pronote: %s", ex)
-
-        # determine previous periods (handle only trimestres and semestres)
-        supported_period_types = ["trimestre", "semestre"]
-        period_type = None
-        raw_previous_periods = []
-        if raw_current_period is not None:
-            period_type = raw_current_period.name.split(" ")[0].lower()
-
-        if period_type in supported_period_types and raw_periods is not None:
-            for period in raw_periods:
-                if (
-                        period.name.lower().startswith(period_type)
-                        and period.start < raw_current_period.start
-                ):
-                    raw_previous_periods.append(period)
-                    period_key = slugify(period.name, separator="_")
-
-                    self.data[
-                        f"grades_{period_key}"
-                    ] = await self.hass.async_add_executor_job(get_grades, period)
-                    self.compare_data(
-                        previous_data,
-                        f"grades_{period_key}",
-                        ["date", "subject", "grade_out_of"],
-                        "new_grade",
-                        format_grade,
-                    )
-                    self.data[
-                        f"averages_{period_key}"
-                    ] = await self.hass.async_add_executor_job(get_averages, period)
-                    self.data[
-                        f"absences_{period_key}"
-                    ] = await self.hass.async_add_executor_job(get_absences, period)
-                    self.compare_data(
-                        previous_data,
-                        f"absences_{period_key}",
-                        ["from", "to"],
-                        "new_absence",
-                        format_absence,
-                    )
-                    self.data[
-                        f"delays_{period_key}"
-                    ] = await self.hass.async_add_executor_job(get_delays, period)
-                    self.compare_data(
-                        previous_data,
-                        f"delays_{period_key}",
-                        ["date", "minutes"],
-                        "new_delay",
-                        format_delay,
-                    )
-                    self.data[
-                        f"evaluations_{period_key}"
-                    ] = await self.hass.async_add_executor_job(get_evaluations, period)
-                    self.compare_data(
-                        previous_data,
-                        f"evaluations_{period_key}",
-                        ["name", "date", "subject"],
-                        "new_evaluation",
-                        format_evaluation,
-                    )
-                    self.data[
-                        f"punishments_{period_key}"
-                    ] = await self.hass.async_add_executor_job(get_punishments, period)
-                    self.data[
-                        f"overall_average_{period_key}"
-                    ] = await self.hass.async_add_executor_job(
-                        get_overall_average, period
-                    )
+        return data, [key for key in datasets if key not in errors]
+
+    def _plan_fetch(self, client, context, today, now, previous_data) -> FetchPlan:
+        """Return the fetch steps of a refresh, and the data reused as is.
+
+        Does not block: closed periods come from the (loaded) period store,
+        and datasets whose time to live has not expired from the data of the
+        last successful refresh.
+        """
+        if context.child_info is None:
+            return FetchPlan(steps={}, reused={}, closed_periods={})
+
+        steps = {
+            "lessons": (self._lesson_range.fetch, client, today),
+            "homework": (get_homework, client, today),
+            "homework_period": (
+                get_homework,
+                client,
+                today,
+                today + timedelta(days=HOMEWORK_MAX_DAYS),
+            ),
+            "information_and_surveys": (
+                get_information_and_surveys,
+                client,
+                datetime.combine(
+                    today - timedelta(days=INFO_SURVEY_LIMIT_MAX_DAYS),
+                    datetime.min.time(),
+                ),
+            ),
+            "ical_url": (client.export_ical,),
+            "menus": (client.menus, today, today + timedelta(days=7)),
+        }
+        if context.current_period is not None:
+            steps.update(_period_steps(context.current_period))
 
-        # Serialize periods to plain objects (drops back-references to client)
-        self.data["periods"] = (
-            [_serialize_period(p) for p in raw_periods]
-            if raw_periods is not None
-            else None
+        # Closed previous periods are served from the persistent store
+        reused = {}
+        revalidation = self.config_entry.options.get(
+            "closed_period_revalidation", DEFAULT_CLOSED_PERIOD_REVALIDATION
         )
-        self.data["current_period"] = (
-            _serialize_period(raw_current_period)
-            if raw_current_period is not None
-            else None
+        revalidate_after = timedelta(days=revalidation) if revalidation > 0 else None
+        closed_periods = {}
+        for period in context.previous_periods:
+            period_key = slugify(period.name, separator="_")
+            period_steps = _period_steps(period, period_key)
+            if period.end < now:
+                stored = self._period_store.get(period_key, now, revalidate_after)
+                if stored is not None:
+                    reused.update(stored)
+                    continue
+                closed_periods[period_key] = list(period_steps)
+            steps.update(period_steps)
+
+        # Only fetch the datasets whose time to live has expired
+        if previous_data is not None:
+            for key in list(steps):
+                if key in previous_data and not self._tiers.is_due(key, now):
+                    reused[key] = previous_data[key]
+                    del steps[key]
+
+        return FetchPlan(steps=steps, reused=reused, closed_periods=closed_periods)
+
+    def _fetch_batch(self, client, config_data, today, now, previous_data):
+        """Run the whole fetch of a refresh in sequence (blocking).
+
+        Returns the context, the plan, the datasets and the fetch errors.
+        """
+        context = get_fetch_context(client, config_data)
+        plan = self._plan_fetch(client, context, today, now, previous_data)
+        datasets = {}
+        errors = {}
+        for key, (func, *args) in plan.steps.items():
+            try:
+                datasets[key] = _fetch_records(func, *args)
+            except Exception as ex:
+                errors[key] = ex
+                datasets[key] = None
+        return context, plan, datasets, errors
+
+    def _report_handoffs(self, fetch_mode: str, parallel_jobs: int) -> None:
+        """Record the executor hand-off overhead of the fetch."""
+        jobs_saved = parallel_jobs - self._handoffs.jobs
+        self.fetch_stats = {
+            "fetch_mode": fetch_mode,
+            "executor_jobs": self._handoffs.jobs,
+            "handoff_ms": round(self._handoffs.handoff * 1000, 3),
+            "jobs_saved": jobs_saved,
+            "handoff_saved_ms": round(
+                jobs_saved * self._handoffs.mean_handoff * 1000, 3
+            ),
+            "executor": self._executor.metrics(),
+            "rate_limiter": self._session.rate_limiter.metrics(),
+        }
+        _LOGGER.debug(
+            "Fetch of %s: %s executor jobs (%s saved), "
+            "%.1f ms of hand-off (about %.1f ms saved)",
+            self.config_entry.title,
+            self.fetch_stats["executor_jobs"],
+            jobs_saved,
+            self.fetch_stats["handoff_ms"],
+            self.fetch_stats["handoff_saved_ms"],
         )
-        self.data["previous_periods"] = [
-            _serialize_period(p) for p in raw_previous_periods
-        ]
-        self.data["active_periods"] = self.data["previous_periods"] + (
-            [self.data["current_period"]]
-            if self.data["current_period"] is not None
-            else []
+        _LOGGER.debug("Pronote thread pool: %s", self.fetch_stats["executor"])
+        _LOGGER.debug("Pronote rate limiter: %s", self.fetch_stats["rate_limiter"])
+
+    async def _async_fetch_datasets(self, steps: dict) -> tuple[dict, dict]:
+        """Run independent fetch steps concurrently.
+
+        ``steps`` maps a data key to a ``(func, *args)`` tuple run in the
+        executor. At most ``max_parallel_fetches`` steps run at once; a failing
+        step only sets its own data key to None. Returns the datasets and the
+        errors, by data key.
+        """
+        semaphore = asyncio.Semaphore(
+            self.config_entry.options.get(
+                "max_parallel_fetches", DEFAULT_MAX_PARALLEL_FETCHES
+            )
+        )
+
+        async def _async_run_step(func, *args):
+            async with semaphore:
+                return await self._handoffs.async_run(_fetch_records, func, *args)
+
+        results = await asyncio.gather(
+            *(_async_run_step(*step) for step in steps.values()),
+            return_exceptions=True,
         )
 
-        # Strip _client back-references to allow GC of the client object graph
-        for value in self.data.values():
-            _strip_client_refs(value)
+        datasets = {}
+        errors = {}
+        for key, result in zip(steps, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                errors[key] = result
+                result = None
+            datasets[key] = result
 
-        return self.data
+        return datasets, errors
 
     def compare_data(
-            self, previous_data, data_key, compare_keys, event_type, format_func
-    ):
-        if (
-                previous_data is not None
-                and previous_data.get(data_key) is not None
-                and self.data.get(data_key) is not None
-        ):
-            not_found_items = []
-            for item in self.data[data_key]:
-                found = False
-                for previous_item in previous_data[data_key]:
-                    if {
-                        key: format_func(previous_item)[key] for key in compare_keys
-                    } == {key: format_func(item)[key] for key in compare_keys}:
-                        found = True
-                        break
-                if found is False:
-                    not_found_items.append(item)
-            for not_found_item in not_found_items:
-                self.trigger_event(event_type, format_func(not_found_item))
-
-    def trigger_event(self, event_type, event_data):
+            self, data, previous_data, data_key, compare_keys, event_type, format_func
+    ) -> DatasetDiff | None:
+        """Fire an event for each new item of a dataset and return the diff.
+
+        The diff of a fetched dataset also feeds its change rate, from which
+        its time to live is adapted. Returns None when there is nothing to
+        compare with.
+        """
+        items = data.get(data_key)
+        if items is None:
+            self._diff_indexes.pop(data_key, None)
+            return None
+
+        previous_index = self._diff_indexes.get(data_key)
+        if previous_index is not None and previous_index.items is items:
+            # dataset reused as is (not refetched)
+            return DatasetDiff([], [], [])
+
+        index = DiffIndex(items, compare_keys, format_func)
+        self._diff_indexes[data_key] = index
+
+        if previous_data is None or previous_data.get(data_key) is None:
+            return None
+        previous_items = previous_data[data_key]
+        if previous_index is None or previous_index.items is not previous_items:
+            previous_index = DiffIndex(previous_items, compare_keys, format_func)
+
+        diff = previous_index.diff(index)
+        self._tiers.record_change(
+            data_key, bool(diff.added or diff.removed or diff.changed)
+        )
+        for formatted in diff.added:
+            self.trigger_event(event_type, formatted, data)
+        return diff
+
+    def trigger_event(self, event_type, event_data, data=None):
+        if data is None:
+            data = self.data
         event_data = {
-            "child_name": self.data["child_info"].name,
+            "child_name": data["child_info"].name,
             "child_nickname": self.config_entry.options.get("nickname"),
-            "child_slug": self.data["sensor_prefix"],
+            "child_slug": data["sensor_prefix"],
             "type": event_type,
             "data": event_data,
         }
         self.hass.bus.async_fire(EVENT_TYPE, event_data)
-
-
-def _serialize_period(period) -> SimpleNamespace:
-    """Convert a pronotepy Period to a plain object without client back-references."""
-    return SimpleNamespace(
-        name=period.name,
-        start=period.start,
-        end=period.end,
-    )
-
-
-def _strip_client_refs(obj, _visited=None):
-    """Null out _client back-references on pronotepy objects to allow GC of the client."""
-    if _visited is None:
-        _visited = set()
-    obj_id = id(obj)
-    if obj_id in _visited:
-        return
-    if isinstance(obj, (str, int, float, bool, type(None), datetime, date, timedelta, SimpleNamespace)):
-        return
-    _visited.add(obj_id)
-
-    if isinstance(obj, (list, tuple)):
-        for item in obj:
-            _strip_client_refs(item, _visited)
-        return
-
-    if isinstance(obj, dict):
-        for val in obj.values():
-            _strip_client_refs(val, _visited)
-        return
-
-    # Null _client if present
-    if hasattr(obj, '_client'):
-        try:
-            obj._client = None
-        except (AttributeError, TypeError):
-            pass
-
-    # Recurse into sub-objects via __slots__ and __dict__
-    for cls in type(obj).__mro__:
-        for slot in getattr(cls, '__slots__', ()):
-            if slot == '_client':
-                continue
-            try:
-                val = getattr(obj, slot)
-            except AttributeError:
-                continue
-            if val is not None and not callable(val):
-                _strip_client_refs(val, _visited)
-
-    for val in getattr(obj, '__dict__', {}).values():
-        if val is not None and not callable(val):
-            _strip_client_refs(val, _visited)
@@ -0,0 +1,67 @@
+"""Dataset diffing for the Pronote integration."""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+
+class DatasetDiff(NamedTuple):
+    """Formatted items added, removed and changed between two refreshes."""
+
+    added: list[dict]
+    removed: list[dict]
+    changed: list[dict]
+
+
+class DiffIndex:
+    """Formatted items of a dataset, indexed by their compare keys.
+
+    Each item is formatted once, when the index is built; the index of a
+    refresh is then reused as the previous index of the next one, so diffing
+    is linear in the size of the dataset.
+    """
+
+    def __init__(self, items, compare_keys, format_func) -> None:
+        """Build the index."""
+        self.items = items
+        self.entries: list[tuple[tuple, dict]] = []
+        self.by_key: dict[tuple, dict] = {}
+        for item in items:
+            formatted = format_func(item)
+            key = tuple(_hashable(formatted[key]) for key in compare_keys)
+            self.entries.append((key, formatted))
+            self.by_key.setdefault(key, formatted)
+
+    def diff(self, current: DiffIndex) -> DatasetDiff:
+        """Return what changed from this (previous) index to the current one.
+
+        Items are identified by their compare keys: an item whose other
+        attributes differ is changed, not added.
+        """
+        previous_by_key = self.by_key
+        return DatasetDiff(
+            added=[
+                formatted
+                for key, formatted in current.entries
+                if key not in previous_by_key
+            ],
+            removed=[
+                formatted
+                for key, formatted in self.entries
+                if key not in current.by_key
+            ],
+            changed=[
+                formatted
+                for key, formatted in current.by_key.items()
+                if key in previous_by_key and previous_by_key[key] != formatted
+            ],
+        )
+
+
+def _hashable(value):
+    """Return a hashable version of a formatted value."""
+    if isinstance(value, list):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    return value
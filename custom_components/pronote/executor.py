@@ -0,0 +1,225 @@
+"""Executor jobs of the Pronote integration."""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import logging
+import threading
+import time
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .const import DEFAULT_EXECUTOR_WORKERS, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_EXECUTOR = f"{DOMAIN}_executor"
+
+
+class PronoteExecutor:
+    """Bounded thread pool running the Pronote I/O of all entries.
+
+    Slow Pronote servers can keep requests waiting for their timeouts: doing
+    it in a dedicated pool leaves HA's default executor to everything else.
+    The jobs of a server can only take half of the threads (see
+    ``host_slot``), so a slow server cannot hold up the others. Tracks the
+    jobs waiting for a thread (queue depth) and their wait time.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        """Initialize the pool."""
+        self.max_workers = max_workers
+        self.host_jobs = max(1, max_workers // 2)
+        self.users = 0
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pronote"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._max_queue_depth = 0
+        self._jobs = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+
+    def host_slot(self, host: str | None):
+        """Return the slots of the jobs of a server, to hold while one runs.
+
+        Held (on the event loop) from before a job is submitted until it has
+        run; nothing is limited without a server.
+        """
+        if host is None:
+            return nullcontext()
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.host_jobs)
+        return self._host_slots[host]
+
+    async def async_run(
+        self,
+        hass: HomeAssistant,
+        func,
+        *args,
+        rate_limiter=None,
+        host=None,
+        tokens: int = 1,
+    ):
+        """Run a blocking function in the pool.
+
+        With a server, the job waits for a slot of the server; with a rate
+        limiter, it is only submitted once it has the ``tokens`` of the
+        requests it is expected to send.
+        """
+        async with self.host_slot(host):
+            if rate_limiter is not None:
+                await rate_limiter.async_reserve(tokens)
+                func = rate_limiter.prepaid(func, tokens)
+            return await self._async_submit(hass, func, *args)
+
+    async def _async_submit(self, hass: HomeAssistant, func, *args):
+        """Submit a job to the pool and wait for its result."""
+        submitted = time.perf_counter()
+
+        def _job():
+            wait = time.perf_counter() - submitted
+            with self._lock:
+                self._queued -= 1
+                self._jobs += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            return func(*args)
+
+        with self._lock:
+            self._queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queued)
+        return await hass.loop.run_in_executor(self._pool, _job)
+
+    def metrics(self) -> dict:
+        """Return the queue depth and wait time metrics of the pool."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "host_jobs": self.host_jobs,
+                "queue_depth": self._queued,
+                "max_queue_depth": self._max_queue_depth,
+                "jobs": self._jobs,
+                "mean_wait_ms": round(
+                    self._total_wait / self._jobs * 1000 if self._jobs else 0.0, 3
+                ),
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+            }
+
+    def shutdown(self) -> None:
+        """Stop the pool, dropping the jobs that have not started."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+@callback
+def async_acquire_executor(hass: HomeAssistant) -> PronoteExecutor:
+    """Return the pool shared by the Pronote entries, creating it if needed.
+
+    The pool is sized with the largest ``executor_workers`` option of the
+    entries when it is created.
+    """
+    executor: PronoteExecutor | None = hass.data.get(DATA_EXECUTOR)
+    if executor is None:
+        max_workers = max(
+            (
+                entry.options.get("executor_workers", DEFAULT_EXECUTOR_WORKERS)
+                for entry in hass.config_entries.async_entries(DOMAIN)
+            ),
+            default=DEFAULT_EXECUTOR_WORKERS,
+        )
+        executor = hass.data[DATA_EXECUTOR] = PronoteExecutor(max_workers)
+        _LOGGER.debug("Started the Pronote thread pool (%s threads)", max_workers)
+
+        @callback
+        def _async_shutdown(event: Event) -> None:
+            if hass.data.get(DATA_EXECUTOR) is executor:
+                hass.data.pop(DATA_EXECUTOR)
+                executor.shutdown()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_shutdown)
+
+    executor.users += 1
+    return executor
+
+
+@callback
+def async_release_executor(hass: HomeAssistant, executor: PronoteExecutor) -> None:
+    """Release the shared pool, stopping it once no entry uses it."""
+    executor.users -= 1
+    if executor.users <= 0:
+        if hass.data.get(DATA_EXECUTOR) is executor:
+            hass.data.pop(DATA_EXECUTOR)
+        executor.shutdown()
+        _LOGGER.debug("Stopped the Pronote thread pool")
+
+
+class HandoffMeter:
+    """Measures the time executor jobs spend being handed over to threads.
+
+    The hand-off of a job is the time from its submission to its start in a
+    worker thread, plus the time from its end to the resumption of the
+    awaiting coroutine: the overhead of running it in the executor.
+
+    Jobs wait for a slot of their server and, with a rate limiter, for the
+    tokens of their expected requests before being submitted; these waits are
+    not part of the hand-off.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        executor: PronoteExecutor,
+        rate_limiter=None,
+        host: str | None = None,
+    ) -> None:
+        """Initialize the meter."""
+        self._hass = hass
+        self._executor = executor
+        self._rate_limiter = rate_limiter
+        self._host = host
+        self.jobs = 0
+        self.handoff = 0.0
+
+    def reset(self) -> None:
+        """Start a new measure."""
+        self.jobs = 0
+        self.handoff = 0.0
+
+    @property
+    def mean_handoff(self) -> float:
+        """Return the mean hand-off of a job, in seconds."""
+        return self.handoff / self.jobs if self.jobs else 0.0
+
+    async def async_run(self, func, *args, tokens: int = 1):
+        """Run a blocking function in the pool and measure its hand-off."""
+        async with self._executor.host_slot(self._host):
+            if self._rate_limiter is not None:
+                await self._rate_limiter.async_reserve(tokens)
+                func = self._rate_limiter.prepaid(func, tokens)
+            return await self._async_run_measured(func, *args)
+
+    async def _async_run_measured(self, func, *args):
+        """Submit a job and measure its hand-off."""
+        times = {}
+
+        def _job():
+            times["started"] = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                times["finished"] = time.perf_counter()
+
+        submitted = time.perf_counter()
+        try:
+            return await self._executor._async_submit(self._hass, _job)
+        finally:
+            resumed = time.perf_counter()
+            self.jobs += 1
+            self.handoff += (times.get("started", resumed) - submitted) + (
+                resumed - times.get("finished", resumed)
+            )
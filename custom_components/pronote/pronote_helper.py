@@ -28,15 +28,22 @@ def assignments_to_self(method) -> set:
 autoslot.assignments_to_self = assignments_to_self
 ### End Hotfix
 
+import asyncio
 import pronotepy
 import json
 import logging
 import re
+import threading
+import traceback
+
+from .timetable import analyze_lessons
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def get_pronote_client(data) -> pronotepy.Client | pronotepy.ParentClient | None:
+def get_pronote_client(
+    data, check_session: bool = True
+) -> pronotepy.Client | pronotepy.ParentClient | None:
     _LOGGER.debug(f"Coordinator uses connection: {data['connection_type']}")
 
     if data["connection_type"] == "qrcode":
@@ -48,6 +55,9 @@ def get_pronote_client(data) -> pronotepy.Client | pronotepy.ParentClient | None
         _LOGGER.warning("Client creation failed")
         return None
 
+    if not check_session:
+        return client
+
     try:
         client.session_check()
     except Exception as e:
@@ -119,21 +129,16 @@ def get_client_from_qr_code(data) -> pronotepy.Client | pronotepy.ParentClient |
             device_name=data.get("device_name", None),
         )
 
-        qr_code_url = client.pronote_url
-        qr_code_username = client.username
-        qr_code_password = client.password
-        qr_code_uuid = client.uuid
-        qr_code_account_pin = client.account_pin
-        qr_code_device_name = client.device_name
-        qr_code_client_identifier = client.client_identifier
-    else:
-        qr_code_url = data["qr_code_url"]
-        qr_code_username = data["qr_code_username"]
-        qr_code_password = data["qr_code_password"]
-        qr_code_uuid = data.get("uuid", data["qr_code_uuid"])
-        qr_code_account_pin = data.get("account_pin", None)
-        qr_code_device_name = data.get("device_name", None)
-        qr_code_client_identifier = data.get("client_identifier", None)
+        # already logged in, with the credentials of the next token login
+        return client
+
+    qr_code_url = data["qr_code_url"]
+    qr_code_username = data["qr_code_username"]
+    qr_code_password = data["qr_code_password"]
+    qr_code_uuid = data.get("uuid", data["qr_code_uuid"])
+    qr_code_account_pin = data.get("account_pin", None)
+    qr_code_device_name = data.get("device_name", None)
+    qr_code_client_identifier = data.get("client_identifier", None)
 
     _LOGGER.info(f"Coordinator uses qr_code_username: {qr_code_username}")
     _LOGGER.info(f"Coordinator uses qr_code_pwd: {qr_code_password}")
@@ -151,13 +156,46 @@ def get_client_from_qr_code(data) -> pronotepy.Client | pronotepy.ParentClient |
     )
 
 
-def get_day_start_at(lessons):
-    day_start_at = None
+def serialize_requests(client, rate_limiter=None):
+    """Make the requests of a client go out one at a time.
+
+    Pronote numbers the requests of a session and rejects out-of-order ones, so
+    datasets fetched concurrently must not interleave their requests. The lock
+    is reentrant because a request may trigger a re-login (``refresh``).
+
+    With a rate limiter, each request takes a token of the server (without
+    waiting: jobs wait for their token before being submitted).
 
-    if lessons is not None:
-        for lesson in lessons:
-            if not lesson.canceled:
-                day_start_at = lesson.start
-                break
+    With debug logging enabled, requests sent from the event loop thread
+    (which they would block) are reported with their stack.
+    """
+    lock = threading.RLock()
+    post = client.post
 
-    return day_start_at
+    def locked_post(function_name, *args, **kwargs):
+        if _LOGGER.isEnabledFor(logging.DEBUG) and _in_event_loop():
+            _LOGGER.warning(
+                "Pronote request %s sent from the event loop thread:\n%s",
+                function_name,
+                "".join(traceback.format_stack()[:-1]),
+            )
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        with lock:
+            return post(function_name, *args, **kwargs)
+
+    client.post = locked_post
+    return client
+
+
+def _in_event_loop() -> bool:
+    """Return True if called from a thread running an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def get_day_start_at(lessons):
+    return analyze_lessons(lessons).start_at
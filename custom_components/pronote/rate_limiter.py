@@ -0,0 +1,154 @@
+"""Request rate limiting of the Pronote integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DEFAULT_REQUEST_BUDGET, DOMAIN, REQUEST_BURST
+from .server_status import get_pronote_base_url
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_RATE_LIMITERS = f"{DOMAIN}_rate_limiters"
+
+
+class PronoteRateLimiter:
+    """Token bucket limiting the requests sent to a Pronote server.
+
+    Shared by all the entries (and sessions) of the server: every request
+    takes a token, tokens are refilled at ``budget`` per minute and up to
+    ``burst`` can be saved.
+
+    Waiting for tokens is done on the event loop, before an executor job is
+    submitted (``async_reserve``), so that a server out of budget never holds
+    threads of the pool shared with the other servers. A job reserves the
+    tokens of the requests it is expected to send (see ``prepaid``); its
+    other requests take tokens without waiting (``acquire``), and the debt
+    they leave is paid by the next jobs, unless it exceeds ``burst``. Tracks
+    the jobs waiting (queue depth) and their wait time.
+    """
+
+    def __init__(self, budget: int, burst: int = REQUEST_BURST) -> None:
+        """Initialize the rate limiter."""
+        self.budget = budget
+        self.burst = burst
+        self._rate = budget / 60
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._queued = 0
+        self._max_queue_depth = 0
+        self._requests = 0
+        self._jobs = 0
+        self._delayed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _take(self, tokens: int = 1) -> float:
+        """Take tokens (going into debt if needed); return the debt to wait."""
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+        self._tokens -= tokens
+        return max(-self._tokens / self._rate, 0.0)
+
+    async def async_reserve(self, tokens: int = 1) -> None:
+        """Wait for tokens, in order, before submitting a job to the executor."""
+        with self._lock:
+            # tokens go negative to reserve the next ones in order
+            wait = self._take(tokens)
+            self._jobs += 1
+            if wait:
+                self._delayed += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+                self._queued += 1
+                self._max_queue_depth = max(self._max_queue_depth, self._queued)
+        if not wait:
+            return
+        _LOGGER.debug("Pronote job delayed by %.1f s (rate limit)", wait)
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            with self._lock:
+                self._queued -= 1
+
+    def prepaid(self, func, tokens: int = 1):
+        """Return a job running ``func`` with ``tokens`` already reserved."""
+
+        def _job(*args):
+            self._local.prepaid = tokens
+            try:
+                return func(*args)
+            finally:
+                self._local.prepaid = 0
+
+        return _job
+
+    def acquire(self) -> None:
+        """Take a token for a request (in the executor).
+
+        Requests beyond the tokens reserved by their job go into debt without
+        waiting, as long as the debt stays within ``burst``.
+        """
+        if getattr(self._local, "prepaid", 0):
+            self._local.prepaid -= 1
+            with self._lock:
+                self._requests += 1
+            return
+        with self._lock:
+            wait = max(self._take() - self.burst / self._rate, 0.0)
+            self._requests += 1
+        if wait:
+            _LOGGER.debug("Pronote request delayed by %.1f s (rate limit)", wait)
+            time.sleep(wait)
+
+    def metrics(self) -> dict:
+        """Return the queue depth and wait time metrics of the limiter."""
+        with self._lock:
+            return {
+                "budget": self.budget,
+                "queue_depth": self._queued,
+                "max_queue_depth": self._max_queue_depth,
+                "requests": self._requests,
+                "jobs": self._jobs,
+                "delayed_jobs": self._delayed,
+                "mean_wait_ms": round(
+                    self._total_wait / self._jobs * 1000 if self._jobs else 0.0, 3
+                ),
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+            }
+
+
+@callback
+def async_get_rate_limiter(hass: HomeAssistant, config_data) -> PronoteRateLimiter:
+    """Return the rate limiter of the server of an entry, creating it if needed.
+
+    The budget is the smallest ``request_budget`` option of the entries using
+    the server when the limiter is created.
+    """
+    limiters: dict[str | None, PronoteRateLimiter] = hass.data.setdefault(
+        DATA_RATE_LIMITERS, {}
+    )
+    base_url = get_pronote_base_url(config_data)
+    limiter = limiters.get(base_url)
+    if limiter is None:
+        budget = min(
+            (
+                entry.options.get("request_budget", DEFAULT_REQUEST_BUDGET)
+                for entry in hass.config_entries.async_entries(DOMAIN)
+                if get_pronote_base_url(entry.data) == base_url
+            ),
+            default=DEFAULT_REQUEST_BUDGET,
+        )
+        limiter = limiters[base_url] = PronoteRateLimiter(budget)
+        _LOGGER.debug("Limiting the requests to %s to %s per minute", base_url, budget)
+    return limiter
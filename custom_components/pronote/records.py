@@ -0,0 +1,190 @@
+"""Snapshot records of pronotepy objects for the Pronote integration."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# Attributes kept from each pronotepy type (by class name): those used by the
+# formatters, the calendar and the events. Anything else, including the
+# back-references to the client, is dropped.
+SCHEMAS = {
+    "ClientInfo": ("name", "class_name", "establishment"),
+    "Period": ("name", "start", "end"),
+    "Subject": ("name", "groups"),
+    "Lesson": (
+        "start",
+        "end",
+        "subject",
+        "teacher_name",
+        "teacher_names",
+        "classroom",
+        "classrooms",
+        "canceled",
+        "status",
+        "background_color",
+        "outing",
+        "memo",
+        "group_name",
+        "group_names",
+        "exempted",
+        "virtual_classrooms",
+        "num",
+        "detention",
+        "test",
+    ),
+    "Grade": (
+        "date",
+        "subject",
+        "comment",
+        "grade",
+        "out_of",
+        "default_out_of",
+        "coefficient",
+        "average",
+        "max",
+        "min",
+        "is_bonus",
+        "is_optionnal",
+        "is_out_of_20",
+    ),
+    "Average": (
+        "student",
+        "class_average",
+        "max",
+        "min",
+        "out_of",
+        "default_out_of",
+        "subject",
+        "background_color",
+    ),
+    "Absence": ("from_date", "to_date", "justified", "hours", "days", "reasons"),
+    "Delay": ("date", "minutes", "justified", "justification", "reasons"),
+    "Evaluation": (
+        "name",
+        "domain",
+        "date",
+        "subject",
+        "description",
+        "coefficient",
+        "paliers",
+        "teacher",
+        "acquisitions",
+    ),
+    "Acquisition": (
+        "order",
+        "name",
+        "abbreviation",
+        "level",
+        "domain",
+        "coefficient",
+        "pillar",
+        "pillar_prefix",
+    ),
+    "Punishment": (
+        "given",
+        "during_lesson",
+        "reasons",
+        "circumstances",
+        "nature",
+        "duration",
+        "homework",
+        "exclusion",
+        "homework_documents",
+        "circumstance_documents",
+        "giver",
+        "schedule",
+        "schedulable",
+    ),
+    "ScheduledPunishment": ("start", "duration"),
+    "Attachment": ("name", "url", "type"),
+    "Menu": (
+        "name",
+        "date",
+        "is_lunch",
+        "is_dinner",
+        "first_meal",
+        "main_meal",
+        "side_meal",
+        "other_meal",
+        "cheese",
+        "dessert",
+    ),
+    "Food": ("name", "labels"),
+    "FoodLabel": ("name", "color"),
+    "Information": (
+        "author",
+        "title",
+        "read",
+        "creation_date",
+        "start_date",
+        "end_date",
+        "category",
+        "survey",
+        "anonymous_response",
+        "attachments",
+        "template",
+        "shared_template",
+        "content",
+    ),
+}
+
+_SCALAR_TYPES = (str, int, float, bool, datetime, date, timedelta)
+
+
+class Record:
+    """Compact, read-only copy of a pronotepy object."""
+
+    __slots__ = ()
+
+    def __init__(self, **fields) -> None:
+        """Initialize the record (missing fields are None)."""
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name))
+
+    def __setattr__(self, name, value) -> None:
+        """Records are read-only."""
+        raise AttributeError(f"{type(self).__name__} records are read-only")
+
+    def __delattr__(self, name) -> None:
+        """Records are read-only."""
+        raise AttributeError(f"{type(self).__name__} records are read-only")
+
+    def __repr__(self) -> str:
+        """Return the representation of the record."""
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+RECORD_TYPES: dict[str, type[Record]] = {
+    name: type(name, (Record,), {"__slots__": fields})
+    for name, fields in SCHEMAS.items()
+}
+
+
+def to_record(value):
+    """Convert a fetched value, recursively, to records.
+
+    Lists and dicts are converted item by item; pronotepy objects are
+    converted according to their schema. Must be run in the executor: some
+    pronotepy attributes are properties.
+    """
+    if value is None or isinstance(value, (_SCALAR_TYPES, Record)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [to_record(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_record(item) for key, item in value.items()}
+
+    record_type = RECORD_TYPES.get(type(value).__name__)
+    if record_type is None:
+        _LOGGER.debug("No record schema for %s, storing it as text", type(value))
+        return str(value)
+    return record_type(
+        **{
+            name: to_record(getattr(value, name, None))
+            for name in record_type.__slots__
+        }
+    )
@@ -0,0 +1,78 @@
+"""Per-dataset refresh tiers for the Pronote integration."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from homeassistant.config_entries import ConfigEntry
+
+from .const import DEFAULT_ADAPTIVE_MAX_TTL, DEFAULT_DATASET_TTLS
+
+# Tolerance so that a dataset due a few seconds after a refresh is not
+# postponed by a whole refresh interval.
+TTL_TOLERANCE = timedelta(minutes=1)
+
+# Weight of the last fetch in the change rate of a data key.
+CHANGE_RATE_ALPHA = 0.5
+
+
+def dataset_of(data_key: str) -> str | None:
+    """Return the dataset a data key belongs to.
+
+    ``grades_trimestre_1`` belongs to ``grades``, ``homework_period`` to
+    ``homework``.
+    """
+    for dataset in DEFAULT_DATASET_TTLS:
+        if data_key == dataset or data_key.startswith(f"{dataset}_"):
+            return dataset
+    return None
+
+
+class RefreshTiers:
+    """Tracks when each data key was fetched, and which ones are due.
+
+    Each dataset has its own time to live (``ttl_<dataset>`` option, in
+    minutes). A TTL of 0 fetches the dataset at every refresh.
+
+    For the data keys whose changes are tracked (see ``record_change``), the
+    TTL adapts to an exponentially weighted rate of the fetches that found a
+    change: from the configured TTL for a key that changes at every fetch to
+    ``adaptive_max_ttl`` for a key that never changes.
+    """
+
+    def __init__(self, entry: ConfigEntry) -> None:
+        """Initialize the refresh tiers."""
+        self._entry = entry
+        self._fetched_at: dict[str, datetime] = {}
+        self.change_rates: dict[str, float] = {}
+
+    def ttl(self, data_key: str) -> timedelta:
+        """Return the time to live of a data key."""
+        dataset = dataset_of(data_key)
+        if dataset is None:
+            return timedelta(0)
+        ttl = self._entry.options.get(f"ttl_{dataset}", DEFAULT_DATASET_TTLS[dataset])
+        max_ttl = self._entry.options.get("adaptive_max_ttl", DEFAULT_ADAPTIVE_MAX_TTL)
+        change_rate = self.change_rates.get(data_key)
+        if change_rate is not None and max_ttl > ttl:
+            # stays close to the configured TTL until changes become rare
+            ttl += (max_ttl - ttl) * (1 - change_rate) ** 2
+        return timedelta(minutes=ttl)
+
+    def record_change(self, data_key: str, changed: bool) -> None:
+        """Record whether a fetch of a data key found a change."""
+        change_rate = self.change_rates.get(data_key, 1.0)
+        self.change_rates[data_key] = (
+            CHANGE_RATE_ALPHA * changed + (1 - CHANGE_RATE_ALPHA) * change_rate
+        )
+
+    def is_due(self, data_key: str, now: datetime) -> bool:
+        """Return True if a data key has to be fetched again."""
+        fetched_at = self._fetched_at.get(data_key)
+        if fetched_at is None:
+            return True
+        return now + TTL_TOLERANCE >= fetched_at + self.ttl(data_key)
+
+    def mark_fetched(self, data_key: str, now: datetime) -> None:
+        """Record a successful fetch of a data key."""
+        self._fetched_at[data_key] = now
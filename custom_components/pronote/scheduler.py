@@ -0,0 +1,122 @@
+"""Refresh scheduling of the Pronote integration."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime, timedelta
+import hashlib
+import random
+from typing import NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+from .server_status import get_pronote_base_url
+
+DATA_LOGIN_SLOTS = f"{DOMAIN}_login_slots"
+
+# Random delay added to each refresh slot, in seconds.
+REFRESH_JITTER = 30
+
+# Logins (or session checks) to the same server running at once.
+MAX_LOGINS_PER_HOST = 2
+
+# Adaptive polling: the refresh interval applies around school hours, it is
+# stretched outside of them and during holidays (no lessons in the next days
+# or outside of the periods of the school year).
+POLLING_SCHOOL_HOURS = "school_hours"
+POLLING_OFF_HOURS = "off_hours"
+POLLING_HOLIDAYS = "holidays"
+SCHOOL_HOURS_MARGIN = timedelta(minutes=30)
+OFF_HOURS_FACTOR = 4
+HOLIDAYS_INTERVAL = timedelta(hours=6)
+HOLIDAYS_LOOKAHEAD = 3
+
+
+def refresh_phase(entry_id: str, interval: float) -> float:
+    """Return the phase of the refreshes of an entry within the interval.
+
+    The phase is derived from the entry id, so it is stable across restarts
+    and spreads the entries evenly over the interval.
+    """
+    digest = hashlib.sha256(entry_id.encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64 * interval
+
+
+def next_refresh_delay(entry_id: str, interval: float, now: float) -> float:
+    """Return the delay until the next refresh slot of an entry, in seconds.
+
+    Slots are ``interval`` apart in wall-clock time (``now`` is a timestamp),
+    at the phase of the entry, whatever the time the entry was set up or last
+    refreshed. A slot closer than a quarter of the interval is skipped, so a
+    refresh never follows the previous one too closely.
+    """
+    delay = (refresh_phase(entry_id, interval) - now) % interval
+    if delay < interval / 4:
+        delay += interval
+    return delay + random.uniform(0, REFRESH_JITTER)
+
+
+class PollingPlan(NamedTuple):
+    """Refresh interval at a time, and when the next refresh must run by."""
+
+    interval: timedelta
+    mode: str | None
+    # longest delay before the next refresh (the next school hours), if any
+    latest: timedelta | None
+
+
+def polling_interval(
+    now: datetime,
+    days: list[tuple[datetime, datetime]],
+    lessons_window: tuple[date, date] | None,
+    periods,
+    interval: timedelta,
+) -> PollingPlan:
+    """Return the refresh interval at a time, and the polling mode that applies.
+
+    ``days`` are the school hours of the cached timetable (see
+    ``school_hours``), which covers the days of ``lessons_window``. The
+    interval is not stretched when the timetable is unknown; the delay of the
+    next refresh, phase and jitter included, must be capped with ``latest`` so
+    it does not run past the school hours of the next school day.
+    """
+    if lessons_window is None:
+        return PollingPlan(interval, None, None)
+
+    next_start = None
+    for start, end in days:
+        if start - SCHOOL_HOURS_MARGIN <= now <= end + SCHOOL_HOURS_MARGIN:
+            return PollingPlan(interval, POLLING_SCHOOL_HOURS, None)
+        if start > now and next_start is None:
+            next_start = start
+
+    lookahead_end = now + timedelta(days=HOLIDAYS_LOOKAHEAD)
+    in_periods = not periods or any(
+        period.start <= now <= period.end for period in periods
+    )
+    if not in_periods or (
+        lessons_window[1] >= lookahead_end.date()
+        and (next_start is None or next_start >= lookahead_end)
+    ):
+        stretched, mode = max(HOLIDAYS_INTERVAL, interval), POLLING_HOLIDAYS
+    else:
+        stretched, mode = interval * OFF_HOURS_FACTOR, POLLING_OFF_HOURS
+
+    latest = None
+    if next_start is not None:
+        latest = next_start - SCHOOL_HOURS_MARGIN - now
+        stretched = min(stretched, latest)
+    return PollingPlan(max(stretched, interval), mode, latest)
+
+
+@callback
+def async_get_login_slots(hass: HomeAssistant, config_data) -> asyncio.Semaphore:
+    """Return the semaphore capping the logins in flight to the server of an entry."""
+    slots: dict[str | None, asyncio.Semaphore] = hass.data.setdefault(
+        DATA_LOGIN_SLOTS, {}
+    )
+    base_url = get_pronote_base_url(config_data)
+    if base_url not in slots:
+        slots[base_url] = asyncio.Semaphore(MAX_LOGINS_PER_HOST)
+    return slots[base_url]
@@ -12,17 +12,12 @@ from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
 )
 
-from datetime import datetime
-
 from .coordinator import PronoteDataUpdateCoordinator
 from .pronote_formatter import *
 from .server_status import PronoteServerStatusSensor, get_pronote_base_url
 
 from .const import (
     DOMAIN,
-    GRADES_TO_DISPLAY,
-    EVALUATIONS_TO_DISPLAY,
-    DEFAULT_LUNCH_BREAK_TIME,
 )
 
 
@@ -284,7 +279,7 @@ class PronoteGenericSensor(CoordinatorEntity, SensorEntity):
             "nickname": self.coordinator.config_entry.options.get("nickname"),
             "via_parent_account": self._account_type == "parent",
             "updated_at": self.coordinator.last_update_success_time,
-        }
+        } | self.coordinator.attributes.get(self._coordinator_key, {})
 
     @property
     def available(self) -> bool:
@@ -375,68 +370,6 @@ class PronoteTimetableSensor(PronoteGenericSensor):
             translation_placeholders=translation_placeholders,
         )
         self._key = key
-        self._start_at = None
-        self._end_at = None
-        self._lunch_break_start_at = None
-        self._lunch_break_end_at = None
-
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        lessons = self.coordinator.data[self._key]
-        attributes = []
-        canceled_counter = None
-        single_day = self._key in [
-            "lessons_today",
-            "lessons_tomorrow",
-            "lessons_next_day",
-        ]
-        lunch_break_time = datetime.strptime(
-            self.coordinator.config_entry.options.get(
-                "lunch_break_time", DEFAULT_LUNCH_BREAK_TIME
-            ),
-            "%H:%M",
-        ).time()
-
-        if lessons is not None:
-            self._start_at = None
-            self._end_at = None
-            self._lunch_break_start_at = None
-            self._lunch_break_end_at = None
-            canceled_counter = 0
-            for lesson in lessons:
-                index = lessons.index(lesson)
-                if not (
-                        lesson.start == lessons[index - 1].start and lesson.canceled is True
-                ):
-                    attributes.append(format_lesson(lesson, lunch_break_time))
-                if lesson.canceled is False and self._start_at is None:
-                    self._start_at = lesson.start
-                if lesson.canceled is True:
-                    canceled_counter += 1
-                if single_day is True and lesson.canceled is False:
-                    self._end_at = lesson.end
-                    if lesson.end.time() < lunch_break_time:
-                        self._lunch_break_start_at = lesson.end
-                    if (
-                            self._lunch_break_end_at is None
-                            and lesson.start.time() >= lunch_break_time
-                    ):
-                        self._lunch_break_end_at = lesson.start
-
-        result = super().extra_state_attributes | {
-            "updated_at": self.coordinator.last_update_success_time,
-            "lessons": attributes,
-            "canceled_lessons_counter": canceled_counter,
-            "day_start_at": self._start_at,
-            "day_end_at": self._end_at,
-        }
-
-        if single_day is True:
-            result["lunch_break_start_at"] = self._lunch_break_start_at
-            result["lunch_break_end_at"] = self._lunch_break_end_at
-
-        return result
 
 
 class PronoteGradesSensor(PronotePeriodRelatedSensor):
@@ -463,23 +396,6 @@ class PronoteGradesSensor(PronotePeriodRelatedSensor):
         )
         self._key = key
 
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        attributes = super().extra_state_attributes
-        grades = []
-        index_note = 0
-        if self.coordinator.data[self._key] is not None:
-            for grade in self.coordinator.data[self._key]:
-                index_note += 1
-                if index_note == GRADES_TO_DISPLAY:
-                    break
-                grades.append(format_grade(grade))
-
-        attributes["grades"] = grades
-
-        return attributes
-
 
 class PronoteHomeworkSensor(PronoteGenericSensor):
     """Representation of a Pronote sensor."""
@@ -503,24 +419,6 @@ class PronoteHomeworkSensor(PronoteGenericSensor):
         )
         self._key = key
 
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        attributes = super().extra_state_attributes
-        homework_attributes = []
-        todo_counter = None
-        if self.coordinator.data[self._key] is not None:
-            todo_counter = 0
-            for homework in self.coordinator.data[self._key]:
-                homework_attributes.append(homework)
-                if homework["done"] is False:
-                    todo_counter += 1
-
-        attributes["homework"] = homework_attributes
-        attributes["todo_counter"] = todo_counter
-
-        return attributes
-
 
 class PronoteAbsensesSensor(PronotePeriodRelatedSensor):
     """Representation of a Pronote sensor."""
@@ -546,19 +444,6 @@ class PronoteAbsensesSensor(PronotePeriodRelatedSensor):
         )
         self._key = key
 
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        attributes = super().extra_state_attributes
-        absences = []
-        if self.coordinator.data[self._key] is not None:
-            for absence in self.coordinator.data[self._key]:
-                absences.append(format_absence(absence))
-
-        attributes["absences"] = absences
-
-        return attributes
-
 
 class PronoteDelaysSensor(PronotePeriodRelatedSensor):
     """Representation of a Pronote sensor."""
@@ -584,19 +469,6 @@ class PronoteDelaysSensor(PronotePeriodRelatedSensor):
         )
         self._key = key
 
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        attributes = super().extra_state_attributes
-        delays = []
-        if self.coordinator.data[self._key] is not None:
-            for delay in self.coordinator.data[self._key]:
-                delays.append(format_delay(delay))
-
-        attributes["delays"] = delays
-
-        return attributes
-
 
 class PronoteEvaluationsSensor(PronotePeriodRelatedSensor):
     """Representation of a Pronote sensor."""
@@ -622,23 +494,6 @@ class PronoteEvaluationsSensor(PronotePeriodRelatedSensor):
         )
         self._key = key
 
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        attributes = super().extra_state_attributes
-        evaluations = []
-        index_note = 0
-        if self.coordinator.data[self._key] is not None:
-            for evaluation in self.coordinator.data[self._key]:
-                index_note += 1
-                if index_note == EVALUATIONS_TO_DISPLAY:
-                    break
-                evaluations.append(format_evaluation(evaluation))
-
-        attributes["evaluations"] = evaluations
-
-        return attributes
-
 
 class PronoteAveragesSensor(PronotePeriodRelatedSensor):
     """Representation of a Pronote sensor."""
@@ -664,19 +519,6 @@ class PronoteAveragesSensor(PronotePeriodRelatedSensor):
         )
         self._key = key
 
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        attributes = super().extra_state_attributes
-        averages = []
-        if self.coordinator.data[self._key] is not None:
-            for average in self.coordinator.data[self._key]:
-                averages.append(format_average(average))
-
-        attributes["averages"] = sorted(averages, key=lambda a: a["subject"])
-
-        return attributes
-
 
 class PronotePunishmentsSensor(PronotePeriodRelatedSensor):
     """Representation of a Pronote sensor."""
@@ -702,19 +544,6 @@ class PronotePunishmentsSensor(PronotePeriodRelatedSensor):
         )
         self._key = key
 
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        attributes = super().extra_state_attributes
-        punishments = []
-        if self.coordinator.data[self._key] is not None:
-            for punishment in self.coordinator.data[self._key]:
-                punishments.append(format_punishment(punishment))
-
-        attributes["punishments"] = punishments
-
-        return attributes
-
 
 class PronoteMenusSensor(PronoteGenericSensor):
     """Representation of a Pronote sensor."""
@@ -729,19 +558,6 @@ class PronoteMenusSensor(PronoteGenericSensor):
             translation_key="menus",
         )
 
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        attributes = super().extra_state_attributes
-        menus = []
-        if self.coordinator.data["menus"] is not None:
-            for menu in self.coordinator.data["menus"]:
-                menus.append(format_menu(menu))
-
-        attributes["menus"] = menus
-
-        return attributes
-
 
 class PronoteInformationAndSurveysSensor(PronoteGenericSensor):
     """Representation of a Pronote sensor."""
@@ -756,28 +572,6 @@ class PronoteInformationAndSurveysSensor(PronoteGenericSensor):
             translation_key="information_and_surveys",
         )
 
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        attributes = super().extra_state_attributes
-        information_and_surveys = []
-        unread_count = None
-        if not self.coordinator.data["information_and_surveys"] is None:
-            unread_count = 0
-            for information_and_survey in self.coordinator.data[
-                "information_and_surveys"
-            ]:
-                information_and_surveys.append(
-                    format_information_and_survey(information_and_survey)
-                )
-                if information_and_survey.read is False:
-                    unread_count += 1
-
-        attributes["unread_count"] = unread_count
-        attributes["information_and_surveys"] = information_and_surveys
-
-        return attributes
-
 
 class PronoteCurrentPeriodSensor(PronoteGenericSensor):
     """Representation of a Pronote sensor."""
@@ -792,14 +586,6 @@ class PronoteCurrentPeriodSensor(PronoteGenericSensor):
         )
         self._state = self.coordinator.data["current_period"].name
 
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        period = self.coordinator.data["current_period"]
-        attributes = super().extra_state_attributes
-
-        return attributes | format_period(period, True)
-
 
 class PronotePeriodsSensor(PronoteGenericSensor):
     """Representation of a Pronote sensor."""
@@ -822,19 +608,3 @@ class PronotePeriodsSensor(PronoteGenericSensor):
             translation_placeholders=translation_placeholders,
         )
         self._key = key
-
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        attributes = super().extra_state_attributes
-        periods = []
-        current_period_name = self.coordinator.data["current_period"].name
-        if not self.coordinator.data[self._key] is None:
-            for period in self.coordinator.data[self._key]:
-                periods.append(
-                    format_period(period, period.name == current_period_name)
-                )
-
-        attributes["periods"] = periods
-
-        return attributes
@@ -3,14 +3,17 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Callable
 import logging
 import re
 from datetime import timedelta
+from typing import NamedTuple
 
 import aiohttp
 
 from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.event import async_track_time_interval
@@ -26,6 +29,8 @@ PROBE_INTERVAL = timedelta(minutes=5)
 # Short timeout: we only need the HTTP status, never the page body.
 PROBE_TIMEOUT = 15
 
+DATA_PROBES = f"{DOMAIN}_probes"
+
 # Stable state slugs (the UI shows localized labels via translations).
 STATE_OPERATIONAL = "operational"
 STATE_MAINTENANCE = "maintenance"
@@ -73,12 +78,153 @@ def server_status_from_http(status: int | None) -> str:
     return STATE_ERROR
 
 
+class ProbeResult(NamedTuple):
+    """Result of a server status probe."""
+
+    http_status: int | None
+    state: str
+    checked_at: str
+
+
+class PronoteServerProbe:
+    """Probes a Pronote server on behalf of all the entries using it.
+
+    One probe runs per base URL, every PROBE_INTERVAL, as long as something is
+    subscribed to it; each result is fanned out to all the subscribers. The
+    probe is a HEAD request (a GET if the server rejects HEAD) made
+    conditional with the validators of the previous response, and redirects
+    are not followed: the status alone tells whether the server answers.
+    Connections are reused through HA's shared client session.
+    """
+
+    def __init__(self, hass: HomeAssistant, base_url: str) -> None:
+        """Initialize the probe."""
+        self.hass = hass
+        self.base_url = base_url
+        self.result: ProbeResult | None = None
+        self._listeners: list[Callable[[ProbeResult], None]] = []
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._lock = asyncio.Lock()
+        self._use_head = True
+        self._validators: dict[str, str] = {}
+
+    @callback
+    def async_subscribe(
+        self, listener: Callable[[ProbeResult], None]
+    ) -> CALLBACK_TYPE:
+        """Call a listener with every probe result; return the unsubscriber.
+
+        The listener is called right away with the last result, if any.
+        """
+        self._listeners.append(listener)
+        if self._unsub_timer is None:
+            self._unsub_timer = async_track_time_interval(
+                self.hass, self._async_scheduled_probe, PROBE_INTERVAL
+            )
+            self.hass.async_create_background_task(
+                self.async_probe(), f"{DOMAIN} probe {self.base_url}"
+            )
+        elif self.result is not None:
+            listener(self.result)
+
+        @callback
+        def _unsubscribe() -> None:
+            self._listeners.remove(listener)
+            if not self._listeners:
+                self._stop()
+
+        return _unsubscribe
+
+    @callback
+    def _stop(self) -> None:
+        """Stop probing once nothing is subscribed anymore."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        probes = self.hass.data.get(DATA_PROBES, {})
+        if probes.get(self.base_url) is self:
+            del probes[self.base_url]
+
+    async def _async_scheduled_probe(self, now) -> None:
+        """Run a probe on the timer."""
+        await self.async_probe()
+
+    async def async_probe(self) -> ProbeResult:
+        """Probe the server now and fan the result out to the subscribers."""
+        if self._lock.locked() and self.result is not None:
+            # a probe is already running, its result will be fanned out
+            return self.result
+        async with self._lock:
+            status = await self._async_request()
+
+        self.result = ProbeResult(
+            http_status=status,
+            state=server_status_from_http(status),
+            checked_at=dt_util.now().isoformat(),
+        )
+        for listener in list(self._listeners):
+            listener(self.result)
+        return self.result
+
+    async def _async_request(self) -> int | None:
+        """Return the HTTP status of the server, None if it does not answer."""
+        session = async_get_clientsession(self.hass)
+        try:
+            if self._use_head:
+                status = await self._async_status(session.head)
+                if not (400 <= status < 500 or status == 501):
+                    return status
+                # HEAD rejected (405, or 403/404 from some servers and WAFs):
+                # only report an error if GET fails too
+                get_status = await self._async_status(session.get)
+                if get_status < 400 or status in (405, 501):
+                    # fall back to GET from now on
+                    self._use_head = False
+                return get_status
+            status = await self._async_status(session.get)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            _LOGGER.debug(
+                "Pronote server status probe failed for %s: %s", self.base_url, err
+            )
+            return None
+        return status
+
+    async def _async_status(self, method) -> int:
+        """Send a conditional request (without following redirects)."""
+        async with method(
+            self.base_url,
+            headers=self._validators,
+            timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT),
+            allow_redirects=False,
+        ) as response:
+            if response.status < 300:
+                self._validators = {
+                    header: response.headers[validator]
+                    for validator, header in (
+                        ("ETag", "If-None-Match"),
+                        ("Last-Modified", "If-Modified-Since"),
+                    )
+                    if validator in response.headers
+                }
+            return response.status
+
+
+@callback
+def async_get_server_probe(hass: HomeAssistant, base_url: str) -> PronoteServerProbe:
+    """Return the probe of a Pronote server, shared by all entries using it."""
+    probes: dict[str, PronoteServerProbe] = hass.data.setdefault(DATA_PROBES, {})
+    probe = probes.get(base_url)
+    if probe is None:
+        probe = probes[base_url] = PronoteServerProbe(hass, base_url)
+    return probe
+
+
 class PronoteServerStatusSensor(SensorEntity):
     """Reports the status of the Pronote server for this child.
 
     This entity is intentionally decoupled from the data coordinator and from
     pronotepy: it answers "what is the Pronote server doing?", not "did the full
-    login succeed?". It performs its own lightweight HTTP probe and stays
+    login succeed?". It follows the lightweight HTTP probe of its server and stays
     available even while the server is down, so it can report that state. Its
     identity is derived from the config entry so it works even when Pronote has
     never been reachable.
@@ -129,37 +275,17 @@ class PronoteServerStatusSensor(SensorEntity):
         }
 
     async def async_added_to_hass(self) -> None:
-        """Probe once on startup, then schedule periodic probes."""
-        await self._async_probe()
-        self.async_write_ha_state()
+        """Subscribe to the probe of the server."""
         self.async_on_remove(
-            async_track_time_interval(
-                self.hass, self._async_scheduled_probe, PROBE_INTERVAL
+            async_get_server_probe(self.hass, self._base_url).async_subscribe(
+                self._handle_probe_result
             )
         )
 
-    async def _async_scheduled_probe(self, now) -> None:
-        """Run a probe on the timer and push the new state."""
-        await self._async_probe()
+    @callback
+    def _handle_probe_result(self, result: ProbeResult) -> None:
+        """Update the state from a probe result."""
+        self._http_status = result.http_status
+        self._attr_native_value = result.state
+        self._last_checked = result.checked_at
         self.async_write_ha_state()
-
-    async def _async_probe(self) -> None:
-        """Probe the Pronote server and update the status state."""
-        session = async_get_clientsession(self.hass)
-        status: int | None = None
-        try:
-            async with session.get(
-                self._base_url,
-                timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT),
-                allow_redirects=True,
-            ) as response:
-                status = response.status
-        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
-            _LOGGER.debug(
-                "Pronote server status probe failed for %s: %s", self._base_url, err
-            )
-            status = None
-
-        self._http_status = status
-        self._attr_native_value = server_status_from_http(status)
-        self._last_checked = dt_util.now().isoformat()
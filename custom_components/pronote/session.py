@@ -0,0 +1,210 @@
+"""Long-lived Pronote session management."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import logging
+
+from pronotepy.dataClasses import Period as PronotePeriod
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .pronote_helper import *
+from .rate_limiter import PronoteRateLimiter, async_get_rate_limiter
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_SESSIONS = f"{DOMAIN}_sessions"
+DATA_HANDOFF = f"{DOMAIN}_handoff"
+
+# A client logged in by the config flow is only reused by an entry set up
+# shortly after.
+HANDOFF_MAX_AGE = timedelta(minutes=5)
+
+
+class PronoteSessionManager:
+    """Keeps a logged-in pronotepy client alive across coordinator refreshes.
+
+    Logging in is by far the most expensive part of a refresh (and, with an
+    ENT, involves a full CAS handshake), so the client is kept between
+    refreshes and only checked with ``session_check()``. pronotepy transparently
+    re-authenticates an expired session during that check; a new client
+    (``token_login`` for QR code entries, a full login otherwise) is only
+    created when the existing one cannot be recovered.
+
+    A session is shared by all the entries of the same account (the children
+    of a parent account): ``lock`` must be held while using the client, since
+    the selected child is a state of the session.
+
+    The requests of the client, and the logins, are limited by the rate
+    limiter of the server.
+
+    All methods are blocking and must be run in an executor.
+    """
+
+    def __init__(self, key: tuple, rate_limiter: PronoteRateLimiter) -> None:
+        """Initialize the session manager."""
+        self.key = key
+        self.rate_limiter = rate_limiter
+        self.users = 0
+        self.lock = asyncio.Lock()
+        self._client: pronotepy.Client | pronotepy.ParentClient | None = None
+
+    @property
+    def client(self) -> pronotepy.Client | pronotepy.ParentClient | None:
+        """Return the current client, if any."""
+        return self._client
+
+    def adopt(self, client) -> None:
+        """Use a client logged in elsewhere (not blocking)."""
+        self._client = serialize_requests(client, self.rate_limiter)
+
+    def get_client(
+        self, config_data
+    ) -> pronotepy.Client | pronotepy.ParentClient | None:
+        """Return a logged-in client, reusing the live session when possible."""
+        if self._client is not None:
+            try:
+                if self._client.session_check():
+                    _LOGGER.debug("Pronote session had expired and was renewed")
+                    _forget_periods(self._client, keep=self._client.periods)
+                return self._client
+            except Exception as err:
+                _LOGGER.info("Pronote session lost, logging in again: %s", err)
+                self.close()
+
+        self.rate_limiter.acquire()
+        client = get_pronote_client(config_data, check_session=False)
+        self._client = (
+            None if client is None else serialize_requests(client, self.rate_limiter)
+        )
+        return self._client
+
+    def close(self) -> None:
+        """Close the current session, if any."""
+        client = self._client
+        self._client = None
+        if client is not None:
+            close_client(client)
+
+
+def close_client(client) -> None:
+    """Close the HTTP session of a client (blocking)."""
+    _forget_periods(client)
+    try:
+        client.communication.session.close()
+    except Exception:
+        pass
+
+
+def account_key(config_data) -> tuple:
+    """Return the key of the Pronote account of an entry."""
+    if config_data["connection_type"] == "qrcode":
+        return (
+            "qrcode",
+            config_data.get("qr_code_url"),
+            config_data.get("qr_code_username"),
+        )
+    return (
+        "username_password",
+        config_data.get("url"),
+        config_data.get("username"),
+        config_data.get("ent"),
+    )
+
+
+@callback
+def async_acquire_session(hass: HomeAssistant, config_data) -> PronoteSessionManager:
+    """Return the session of the account of an entry, shared with its other entries."""
+    sessions: dict[tuple, PronoteSessionManager] = hass.data.setdefault(
+        DATA_SESSIONS, {}
+    )
+    key = account_key(config_data)
+    session = sessions.get(key)
+    handoff = hass.data.get(DATA_HANDOFF, {}).pop(key, None)
+    if handoff is not None:
+        client, handed_off_at, cancel_expiry = handoff
+        cancel_expiry()
+    if session is None:
+        session = sessions[key] = PronoteSessionManager(
+            key, async_get_rate_limiter(hass, config_data)
+        )
+        if handoff is not None and dt_util.utcnow() - handed_off_at <= HANDOFF_MAX_AGE:
+            _LOGGER.debug("Reusing the client logged in by the config flow")
+            session.adopt(client)
+            handoff = None
+    if handoff is not None:
+        # the account already has a session, or the client is too old
+        hass.async_add_executor_job(close_client, client)
+    session.users += 1
+    return session
+
+
+@callback
+def async_handoff_client(hass: HomeAssistant, config_data, client) -> None:
+    """Keep the client logged in by the config flow for the new entry.
+
+    Its first refresh then uses the validated session instead of logging in
+    (or exchanging a QR code token) again. The client is closed if no entry
+    takes it within HANDOFF_MAX_AGE.
+    """
+    handoffs = hass.data.setdefault(DATA_HANDOFF, {})
+    key = account_key(config_data)
+
+    @callback
+    def _async_expire(now) -> None:
+        if handoffs.get(key, (None,))[0] is client:
+            del handoffs[key]
+            hass.async_add_executor_job(close_client, client)
+
+    previous = handoffs.pop(key, None)
+    if previous is not None:
+        previous[2]()
+        hass.async_add_executor_job(close_client, previous[0])
+    handoffs[key] = (
+        client,
+        dt_util.utcnow(),
+        async_call_later(hass, HANDOFF_MAX_AGE, _async_expire),
+    )
+
+
+@callback
+def async_release_session(hass: HomeAssistant, session: PronoteSessionManager) -> bool:
+    """Release the session of an entry.
+
+    Returns True if no other entry uses it anymore: it must then be closed.
+    """
+    session.users -= 1
+    if session.users > 0:
+        return False
+    sessions = hass.data.get(DATA_SESSIONS, {})
+    if sessions.get(session.key) is session:
+        del sessions[session.key]
+    return True
+
+
+def select_child(client, config_data) -> None:
+    """Select the child of an entry, for a parent account (blocking)."""
+    if config_data["account_type"] == "parent":
+        client.set_child(config_data["child"])
+
+
+def _forget_periods(client, keep=()) -> None:
+    """Drop the periods of a client from pronotepy's class-level registry.
+
+    ``Period.instances`` accumulates every Period ever created and is used to
+    resolve ``Grade.period``, so only the periods of a closed session (or those
+    replaced by a session renewal) can be dropped.
+    """
+    keep = set(keep)
+    PronotePeriod.instances.difference_update(
+        [
+            period
+            for period in list(PronotePeriod.instances)
+            if getattr(period, "_client", None) is client and period not in keep
+        ]
+    )
@@ -0,0 +1,67 @@
+"""JSON serialization of coordinator data for the Pronote integration."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from .records import RECORD_TYPES, Record
+
+TYPE_KEY = "__type__"
+
+
+def dump_value(value):
+    """Convert a data value to a JSON-serializable structure.
+
+    Records are stored with their type name and fields, and restored as
+    records of the same type.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, datetime):
+        return {TYPE_KEY: "datetime", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {TYPE_KEY: "date", "value": value.isoformat()}
+    if isinstance(value, timedelta):
+        return {TYPE_KEY: "timedelta", "value": value.total_seconds()}
+    if isinstance(value, (list, tuple)):
+        return [dump_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: dump_value(item) for key, item in value.items()}
+    if isinstance(value, Record):
+        return {
+            TYPE_KEY: "record",
+            "name": type(value).__name__,
+            "fields": {
+                name: dump_value(getattr(value, name)) for name in value.__slots__
+            },
+        }
+    if isinstance(value, SimpleNamespace):
+        return {
+            TYPE_KEY: "record",
+            "fields": {name: dump_value(item) for name, item in vars(value).items()},
+        }
+    raise TypeError(f"Cannot store {type(value).__name__} values")
+
+
+def load_value(value):
+    """Restore a value converted with dump_value."""
+    if isinstance(value, list):
+        return [load_value(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    value_type = value.get(TYPE_KEY)
+    if value_type is None:
+        return {key: load_value(item) for key, item in value.items()}
+    if value_type == "datetime":
+        return datetime.fromisoformat(value["value"])
+    if value_type == "date":
+        return date.fromisoformat(value["value"])
+    if value_type == "timedelta":
+        return timedelta(seconds=value["value"])
+    fields = {name: load_value(item) for name, item in value["fields"].items()}
+    record_type = RECORD_TYPES.get(value.get("name"))
+    if record_type is None:
+        # stored before records had a type name
+        return SimpleNamespace(**fields)
+    return record_type(**fields)
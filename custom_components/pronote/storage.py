@@ -0,0 +1,127 @@
+"""Persistent storage for the Pronote integration."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .snapshot import dump_value, load_value
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+# Older snapshots are not used to warm-start the coordinator.
+SNAPSHOT_MAX_AGE = timedelta(days=7)
+
+
+class PronotePeriodStore:
+    """Persistent cache of the datasets of closed (previous) periods.
+
+    A period that has ended does not change anymore, so its datasets are
+    stored once and served from disk, optionally revalidated every
+    ``revalidate_after``.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the period store."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}_periods")
+        self._periods: dict[str, dict] | None = None
+
+    async def async_load(self) -> None:
+        """Load the stored periods (once)."""
+        if self._periods is not None:
+            return
+        stored = await self._store.async_load() or {}
+        self._periods = {
+            period_key: {
+                "fetched_at": datetime.fromisoformat(period["fetched_at"]),
+                "data": load_value(period["data"]),
+            }
+            for period_key, period in stored.get("periods", {}).items()
+        }
+
+    def get(
+        self, period_key: str, now: datetime, revalidate_after: timedelta | None
+    ) -> dict | None:
+        """Return the stored datasets of a period, None if missing or stale."""
+        period = (self._periods or {}).get(period_key)
+        if period is None:
+            return None
+        if (
+            revalidate_after is not None
+            and now >= period["fetched_at"] + revalidate_after
+        ):
+            return None
+        return period["data"]
+
+    @callback
+    def async_set(
+        self, period_key: str, data: dict, now: datetime, keep: list[str]
+    ) -> None:
+        """Store the datasets of a closed period.
+
+        Periods not in ``keep`` (e.g. from a previous school year) are dropped.
+        """
+        if self._periods is None:
+            self._periods = {}
+        self._periods[period_key] = {"fetched_at": now, "data": data}
+        for stale_key in set(self._periods) - set(keep):
+            del self._periods[stale_key]
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Remove the stored periods."""
+        await self._store.async_remove()
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the data to store."""
+        return {
+            "periods": {
+                period_key: {
+                    "fetched_at": period["fetched_at"].isoformat(),
+                    "data": dump_value(period["data"]),
+                }
+                for period_key, period in (self._periods or {}).items()
+            }
+        }
+
+
+class PronoteSnapshotStore:
+    """Persistent copy of the last good coordinator data.
+
+    It is loaded at startup so that entities can be created right away with
+    stale-but-valid data, while fresh data is fetched in the background.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the snapshot store."""
+        self._hass = hass
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}_snapshot")
+
+    async def async_load(self) -> tuple[dict, datetime] | None:
+        """Return the stored data and its date, None if missing or too old."""
+        stored = await self._store.async_load()
+        if not stored:
+            return None
+        saved_at = datetime.fromisoformat(stored["saved_at"])
+        if dt_util.utcnow() - saved_at > SNAPSHOT_MAX_AGE:
+            return None
+        data = await self._hass.async_add_executor_job(load_value, stored["data"])
+        return data, saved_at
+
+    async def async_save(self, data: dict) -> None:
+        """Store the data of a successful refresh."""
+        dumped = await self._hass.async_add_executor_job(dump_value, data)
+        saved_at = dt_util.utcnow().isoformat()
+        self._store.async_delay_save(
+            lambda: {"saved_at": saved_at, "data": dumped}, SAVE_DELAY
+        )
+
+    async def async_remove(self) -> None:
+        """Remove the stored snapshot."""
+        await self._store.async_remove()
@@ -0,0 +1,313 @@
+"""Timetable helpers for the Pronote integration."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, time, timedelta
+import logging
+from typing import NamedTuple
+
+from .const import (
+    LESSON_CACHE_MAX_AGE,
+    LESSON_CACHE_MAX_DAYS,
+    LESSON_MAX_DAYS,
+    LESSON_NEXT_DAY_SEARCH_LIMIT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LessonRangeFetcher:
+    """Fetches the lessons of the upcoming days with a single range query.
+
+    Some servers reject ranges that are too long (e.g. crossing the end of the
+    school year). The longest accepted range is then found with a binary
+    search, and remembered so that later refreshes of the same day start from
+    it. The full range is tried again on the next day.
+
+    An empty result is a valid answer (holidays): a shorter range cannot hold
+    more lessons, so it is returned as is.
+    """
+
+    def __init__(self, max_days: int = LESSON_NEXT_DAY_SEARCH_LIMIT) -> None:
+        """Initialize the fetcher."""
+        self._max_days = max_days
+        self._horizon = max_days
+        self._horizon_day: date | None = None
+
+    @property
+    def horizon(self) -> int:
+        """Return the number of days of the last accepted range."""
+        return self._horizon
+
+    def fetch(self, client, today: date):
+        """Return the sorted lessons from today, None if no range is accepted."""
+        if self._horizon_day != today:
+            self._horizon = self._max_days
+            self._horizon_day = today
+
+        try:
+            lessons = client.lessons(today, today + timedelta(days=self._horizon))
+        except Exception as ex:
+            _LOGGER.debug(
+                "Lessons range of %s days rejected, searching the longest accepted one (%s)",
+                self._horizon,
+                ex,
+            )
+        else:
+            return sorted(lessons, key=lambda lesson: lesson.start)
+
+        # longest accepted range is in [low, high[, 0 meaning none
+        low, high = 0, self._horizon
+        lessons = None
+        while high - low > 1:
+            delta = (low + high) // 2
+            try:
+                result = client.lessons(today, today + timedelta(days=delta))
+            except Exception:
+                high = delta
+            else:
+                low, lessons = delta, result
+
+        if lessons is None:
+            return None
+
+        _LOGGER.debug(
+            "Lessons range accepted up to %s days, for a maximum of %s from today",
+            low,
+            self._max_days,
+        )
+        self._horizon = low
+        return sorted(lessons, key=lambda lesson: lesson.start)
+
+
+def split_lessons(lessons, today: date) -> dict:
+    """Split a window of sorted lessons into the timetable views.
+
+    Returns the ``lessons_today``, ``lessons_tomorrow``, ``lessons_next_day``
+    (first day with lessons after today, within LESSON_NEXT_DAY_SEARCH_LIMIT
+    days) and ``lessons_period`` (LESSON_MAX_DAYS days from today) lists.
+    """
+    if lessons is None:
+        return {
+            "lessons_today": None,
+            "lessons_tomorrow": None,
+            "lessons_next_day": None,
+            "lessons_period": None,
+        }
+
+    lessons_by_day = defaultdict(list)
+    for lesson in lessons:
+        lessons_by_day[lesson.start.date()].append(lesson)
+
+    tomorrow = today + timedelta(days=1)
+    next_day_limit = today + timedelta(days=LESSON_NEXT_DAY_SEARCH_LIMIT)
+    period_end = today + timedelta(days=LESSON_MAX_DAYS)
+
+    return {
+        "lessons_today": lessons_by_day.get(today, []),
+        "lessons_tomorrow": lessons_by_day.get(tomorrow, []),
+        "lessons_next_day": next(
+            (
+                lessons_by_day[day]
+                for day in sorted(lessons_by_day)
+                if tomorrow <= day < next_day_limit
+            ),
+            None,
+        ),
+        "lessons_period": [
+            lesson for lesson in lessons if lesson.start.date() < period_end
+        ],
+    }
+
+
+def day_start_times(lessons) -> list[datetime]:
+    """Return the start of each day of sorted lessons.
+
+    A day starts with its first lesson that is not canceled; days with only
+    canceled lessons are skipped.
+    """
+    starts = []
+    last_day = None
+    for lesson in lessons or ():
+        if lesson.canceled or lesson.start.date() == last_day:
+            continue
+        starts.append(lesson.start)
+        last_day = lesson.start.date()
+    return starts
+
+
+def school_hours(lessons) -> list[tuple[datetime, datetime]]:
+    """Return the start and end of each day of sorted lessons.
+
+    Canceled lessons are ignored; days with only canceled lessons are skipped.
+    """
+    days: dict[date, tuple[datetime, datetime]] = {}
+    for lesson in lessons or ():
+        if lesson.canceled:
+            continue
+        day = lesson.start.date()
+        start, end = days.get(day, (lesson.start, lesson.end))
+        days[day] = (start, max(end, lesson.end))
+    return list(days.values())
+
+
+class TimetableAnalysis(NamedTuple):
+    """Result of a single pass over sorted lessons."""
+
+    # lessons without the canceled ones replaced by a lesson at the same time
+    lessons: list
+    # lessons that are not canceled
+    active_lessons: list
+    canceled_count: int
+    start_at: datetime | None
+    end_at: datetime | None
+    lunch_break_start_at: datetime | None
+    lunch_break_end_at: datetime | None
+
+
+def analyze_lessons(
+    lessons, lunch_break_time: time | None = None
+) -> TimetableAnalysis:
+    """Analyze lessons sorted by start time, in one pass.
+
+    The day start is the start of the first lesson that is not canceled, the
+    day end the end of the last one. The lunch break, only meaningful for a
+    single day (and if ``lunch_break_time`` is given), goes from the end of the
+    last lesson ending before lunch_break_time to the start of the first one
+    starting after it.
+    """
+    displayed = []
+    active = []
+    canceled_count = 0
+    lunch_break_start_at = None
+    lunch_break_end_at = None
+    previous = None
+
+    for lesson in lessons or ():
+        if lesson.canceled:
+            canceled_count += 1
+            if previous is None or previous.start != lesson.start:
+                displayed.append(lesson)
+        else:
+            displayed.append(lesson)
+            active.append(lesson)
+            if lunch_break_time is not None:
+                if lesson.end.time() < lunch_break_time:
+                    lunch_break_start_at = lesson.end
+                if (
+                    lunch_break_end_at is None
+                    and lesson.start.time() >= lunch_break_time
+                ):
+                    lunch_break_end_at = lesson.start
+        previous = lesson
+
+    return TimetableAnalysis(
+        lessons=displayed,
+        active_lessons=active,
+        canceled_count=canceled_count,
+        start_at=active[0].start if active else None,
+        end_at=active[-1].end if active else None,
+        lunch_break_start_at=lunch_break_start_at,
+        lunch_break_end_at=lunch_break_end_at,
+    )
+
+
+class LessonIndex:
+    """Items with a start and an end (lessons, events), searchable by range.
+
+    Items must be sorted by start. A range query bisects the start times, so
+    it only visits the items it returns (plus those starting within the
+    longest item duration before the range).
+    """
+
+    def __init__(self, items) -> None:
+        """Build the index."""
+        self._items = list(items)
+        self._starts = [item.start for item in self._items]
+        self._max_duration = max(
+            (item.end - item.start for item in self._items), default=timedelta(0)
+        )
+        self._boundaries = sorted(
+            {item.start for item in self._items} | {item.end for item in self._items}
+        )
+
+    def current_or_next(self, moment):
+        """Return the item in progress at a moment, else the next one, if any."""
+        low = bisect_left(self._starts, moment - self._max_duration)
+        return next(
+            (item for item in self._items[low:] if item.end > moment), None
+        )
+
+    def next_boundary(self, moment):
+        """Return the first start or end strictly after a moment, if any."""
+        index = bisect_right(self._boundaries, moment)
+        if index == len(self._boundaries):
+            return None
+        return self._boundaries[index]
+
+    def between(self, start, end) -> list:
+        """Return the items overlapping [start, end[."""
+        low = bisect_left(self._starts, start - self._max_duration)
+        high = bisect_left(self._starts, end)
+        return [item for item in self._items[low:high] if item.end > start]
+
+
+class LessonCache:
+    """Lessons of days outside of the refreshed window, keyed by date.
+
+    Days are fetched on demand (e.g. when browsing the calendar), and kept
+    LESSON_CACHE_MAX_AGE minutes. At most LESSON_CACHE_MAX_DAYS days are kept,
+    the least recently used are dropped first.
+    """
+
+    def __init__(
+        self,
+        max_days: int = LESSON_CACHE_MAX_DAYS,
+        max_age: timedelta = timedelta(minutes=LESSON_CACHE_MAX_AGE),
+    ) -> None:
+        """Initialize the cache."""
+        self._max_days = max_days
+        self._max_age = max_age
+        self._days: OrderedDict[date, tuple[datetime, list]] = OrderedDict()
+
+    def missing_days(self, first_day: date, last_day: date, now: datetime) -> list:
+        """Return the days of a range which are not cached (or expired)."""
+        missing = []
+        day = first_day
+        while day <= last_day:
+            cached = self._days.get(day)
+            if cached is None or now - cached[0] > self._max_age:
+                missing.append(day)
+            day += timedelta(days=1)
+        return missing
+
+    def get(self, first_day: date, last_day: date) -> list:
+        """Return the cached lessons of a range of days, sorted by start."""
+        lessons = []
+        day = first_day
+        while day <= last_day:
+            if day in self._days:
+                self._days.move_to_end(day)
+                lessons.extend(self._days[day][1])
+            day += timedelta(days=1)
+        return lessons
+
+    def set(self, first_day: date, last_day: date, lessons, now: datetime) -> None:
+        """Store the lessons fetched for a range of days (days without any too)."""
+        lessons_by_day = defaultdict(list)
+        for lesson in sorted(lessons, key=lambda lesson: lesson.start):
+            lessons_by_day[lesson.start.date()].append(lesson)
+
+        day = first_day
+        while day <= last_day:
+            self._days[day] = (now, lessons_by_day.get(day, []))
+            self._days.move_to_end(day)
+            day += timedelta(days=1)
+        while len(self._days) > self._max_days:
+            self._days.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all the cached days."""
+        self._days.clear()